@@ -24,6 +24,8 @@ from backend.config.config import config_map
 from backend.models import db, init_models
 from backend.utils.logger import setup_logging
 from backend.utils.cache_control import init_cache_control_helpers
+from backend.utils.json_provider import init_json_provider
+from backend.utils.compression import init_compression
 
 def create_app(config_name='development'):
     """应用工厂函数"""
@@ -35,6 +37,9 @@ def create_app(config_name='development'):
     config_class = config_map.get(config_name, config_map['default'])
     app.config.from_object(config_class)
     
+    # JSON编码（可用时使用orjson）
+    init_json_provider(app)
+    
     # 初始化扩展
     db.init_app(app)
     
@@ -65,6 +70,9 @@ def create_app(config_name='development'):
     # 初始化缓存控制
     init_cache_control_helpers(app)
     
+    # 初始化响应压缩（gzip/brotli）
+    init_compression(app)
+    
     # 在应用上下文中初始化模型
     with app.app_context():
         # 初始化模型
@@ -78,11 +86,16 @@ def create_app(config_name='development'):
             
             # 创建表
             db.create_all()
+            Product.ensure_indexes()
             
             # 创建点赞数据表
             from backend.models.brand_like import BrandLike
             BrandLike.create_table()
             
+            # 后台构建点赞状态过滤器
+            from backend.services.like_filter import like_filter
+            like_filter.start_rebuild()
+            
             print("✅ 数据表创建成功")
             
             # 创建默认管理员（如果不存在）
@@ -107,6 +120,35 @@ def create_app(config_name='development'):
     except ImportError as e:
         print(f"警告: 路由导入失败 - {e}")
     
+    # 启动图片目录监听，图片增删改增量同步到图片索引
+    if app.config.get('IMAGE_WATCHER_ENABLED') and app.config.get('IMAGE_SOURCE') == 'local':
+        try:
+            from backend.services.image_service import ImageService
+            from backend.services.image_watcher import start_image_watcher
+            start_image_watcher(ImageService().catalog, poll_interval=app.config['IMAGE_WATCHER_POLL_INTERVAL'])
+        except Exception as e:
+            print(f"⚠️ 图片目录监听启动失败: {e}")
+    
+    # 启动本地衍生图流水线，为列表页生成缩略图
+    if app.config.get('IMAGE_DERIVATIVES_ENABLED') and app.config.get('IMAGE_SOURCE') == 'local':
+        try:
+            from backend.services.image_service import ImageService
+            from backend.services.image_derivatives import start_derivative_pipeline
+            start_derivative_pipeline(ImageService().catalog, workers=app.config['IMAGE_DERIVATIVE_WORKERS'] or None)
+        except Exception as e:
+            print(f"⚠️ 衍生图流水线启动失败: {e}")
+    
+    # 静态图片按Accept返回WebP/AVIF兄弟文件，并在后台补齐编码
+    from backend.services.image_variants import register_static_negotiation
+    register_static_negotiation(app)
+    if app.config.get('IMAGE_VARIANTS_ENABLED') and app.config.get('IMAGE_SOURCE') == 'local':
+        try:
+            from backend.services.image_service import ImageService
+            from backend.services.image_variants import start_variant_encoder
+            start_variant_encoder(ImageService().catalog, workers=app.config['IMAGE_DERIVATIVE_WORKERS'] or None)
+        except Exception as e:
+            print(f"⚠️ 图片兄弟文件编码启动失败: {e}")
+    
     # 注册基本路由
     @app.route('/')
     def index():
@@ -57,13 +57,31 @@ class Config:
     # 可选值: 'oss', 'local'
     IMAGE_SOURCE = os.environ.get('IMAGE_SOURCE', 'local').lower()
     
+    # 图片目录监听 - Linux下使用inotify，不可用时按间隔轮询目录mtime
+    IMAGE_WATCHER_ENABLED = os.environ.get('IMAGE_WATCHER_ENABLED', 'true').lower() == 'true'
+    IMAGE_WATCHER_POLL_INTERVAL = float(os.environ.get('IMAGE_WATCHER_POLL_INTERVAL') or 10)
+    
+    # 本地衍生图（缩略图/中等尺寸）- 按OSS处理参数在进程池中生成
+    IMAGE_DERIVATIVES_ENABLED = os.environ.get('IMAGE_DERIVATIVES_ENABLED', 'true').lower() == 'true'
+    IMAGE_DERIVATIVE_WORKERS = int(os.environ.get('IMAGE_DERIVATIVE_WORKERS') or 0)
+    
+    # 图片发送卸载 - none/nginx(X-Accel-Redirect)/sendfile(X-Sendfile)/auto，
+    # 仅在代理请求带 X-Sendfile-Type 头时生效，前缀对应nginx的internal location
+    IMAGE_OFFLOAD_MODE = os.environ.get('IMAGE_OFFLOAD_MODE', 'none').lower()
+    IMAGE_OFFLOAD_PREFIX = os.environ.get('IMAGE_OFFLOAD_PREFIX') or '/protected-images/'
+    IMAGE_OFFLOAD_CACHE_PREFIX = os.environ.get('IMAGE_OFFLOAD_CACHE_PREFIX') or '/protected-resized/'
+    
+    # 图片格式协商 - 后台为原图预编码WebP/AVIF兄弟文件，按Accept返回
+    IMAGE_VARIANTS_ENABLED = os.environ.get('IMAGE_VARIANTS_ENABLED', 'true').lower() == 'true'
+    
     # 图片处理参数
     OSS_THUMBNAIL_PARAMS = '?x-oss-process=image/resize,w_300,h_300,m_lfit/quality,q_80/format,webp'
     OSS_MEDIUM_PARAMS = '?x-oss-process=image/resize,w_800,h_800,m_lfit/quality,q_90/format,webp'
     
     # API配置
     JSON_AS_ASCII = False
-    JSONIFY_PRETTYPRINT_REGULAR = True
+    JSONIFY_PRETTYPRINT_REGULAR = True  # 仅调试模式生效，生产环境始终紧凑输出
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')  # auto/orjson/json，auto在安装了orjson时使用orjson
     
     # CORS配置 - 从环境变量读取
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:8500,http://121.36.205.70:8500,http://chenxiaoshivivid.com.cn:8500,http://www.chenxiaoshivivid.com.cn:8500').split(',')
@@ -96,6 +114,9 @@ class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    IMAGE_WATCHER_ENABLED = False
+    IMAGE_DERIVATIVES_ENABLED = False
+    IMAGE_VARIANTS_ENABLED = False
 
 # 配置映射
 config_map = {
@@ -1,29 +1,21 @@
 from datetime import datetime
 import logging
+
 import pymysql
-import os
+
+from backend.services.like_counter import like_counter
+from backend.services.like_filter import like_filter
+from backend.utils.db_pool import mysql_pool
 
 logger = logging.getLogger(__name__)
 
+# 事务因死锁(1213)或锁等待超时(1205)被回滚时的重试次数
+LOCK_ERRORS = (1213, 1205)
+LOCK_RETRIES = 1
+
 def get_db_connection():
-    """获取数据库连接"""
-    # 使用和config.py相同的数据库配置
-    host = os.environ.get('DB_HOST', '47.118.250.53')
-    port = int(os.environ.get('DB_PORT', 3306))
-    user = os.environ.get('DB_USER', 'nanyi')
-    password = os.environ.get('DB_PASSWORD', 'admin123456!')
-    database = os.environ.get('DB_NAME', 'nanyiqiutang')
-    
-    return pymysql.connect(
-        host=host,
-        port=port,
-        user=user,
-        password=password,
-        database=database,
-        charset='utf8mb4',
-        autocommit=True,
-        cursorclass=pymysql.cursors.DictCursor
-    )
+    """从连接池取出数据库连接，close()时归还连接池"""
+    return mysql_pool.connect()
 
 class BrandLike:
     """布料点赞数据模型"""
@@ -73,57 +65,99 @@ class BrandLike:
             if 'connection' in locals():
                 connection.close()
     
+    @staticmethod
+    def _insert_like(cursor, brand_name, user_hash, ip_address, user_agent):
+        """插入点赞记录，返回是否新增（唯一键冲突说明已点赞过）"""
+        cursor.execute("""
+            INSERT IGNORE INTO brand_likes (brand_name, user_hash, ip_address, user_agent)
+            VALUES (%s, %s, %s, %s)
+        """, (brand_name, user_hash, ip_address, user_agent))
+        return cursor.rowcount == 1
+    
+    @staticmethod
+    def _delete_like(cursor, brand_name, user_hash):
+        """删除点赞记录，返回是否删除了记录"""
+        cursor.execute("""
+            DELETE FROM brand_likes 
+            WHERE brand_name = %s AND user_hash = %s
+        """, (brand_name, user_hash))
+        return cursor.rowcount == 1
+    
+    @staticmethod
+    def _read_count(cursor, brand_name):
+        """数据库中的点赞数加上尚未写回的增量"""
+        cursor.execute("""
+            SELECT like_count FROM brand_like_stats WHERE brand_name = %s
+        """, (brand_name,))
+        result = cursor.fetchone()
+        return max((result['like_count'] if result else 0) + like_counter.pending(brand_name), 0)
+    
+    @staticmethod
+    def _change_like(brand_name, user_hash, ip_address=None, user_agent=None, mode='toggle'):
+        """在一个连接、一个事务中修改点赞记录，点赞数增减交给like_counter批量写回
+
+        mode: like/unlike/toggle；由INSERT IGNORE/DELETE的影响行数判断结果
+        同一用户并发取消点赞时，两个事务都持有INSERT IGNORE加的共享锁、又都等待DELETE的排他锁，
+        InnoDB会回滚其中一个（死锁1213/锁等待超时1205），这里回滚后重试，重试时按最新状态切换
+        返回 (是否有变化, 最新点赞数, 当前是否已点赞)
+        """
+        connection = get_db_connection()
+        try:
+            for attempt in range(LOCK_RETRIES + 1):
+                try:
+                    connection.begin()
+                    cursor = connection.cursor()
+                    
+                    liked = False
+                    if mode != 'unlike':
+                        liked = BrandLike._insert_like(cursor, brand_name, user_hash, ip_address, user_agent)
+                    if liked:
+                        changed, delta = True, 1
+                    elif mode == 'like':
+                        changed, delta, liked = False, 0, True
+                    else:
+                        changed = BrandLike._delete_like(cursor, brand_name, user_hash)
+                        delta = -1
+                    
+                    connection.commit()
+                    break
+                except pymysql.err.OperationalError as e:
+                    connection.rollback()
+                    if e.args[0] not in LOCK_ERRORS or attempt == LOCK_RETRIES:
+                        raise
+                    logger.warning(f"点赞事务锁冲突，重试: {e}")
+                except Exception:
+                    connection.rollback()
+                    raise
+            
+            # 点赞记录提交后再计入增量，事务回滚时不会留下多余的计数
+            if changed:
+                like_counter.add(brand_name, delta)
+            like_filter.record(brand_name, user_hash, liked)
+            return changed, BrandLike._read_count(cursor, brand_name), liked
+        finally:
+            connection.close()
+    
     @staticmethod
     def add_like(brand_name, user_hash, ip_address=None, user_agent=None):
         """添加点赞记录"""
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
-            
-            # 检查是否已经点赞过
-            cursor.execute("""
-                SELECT id FROM brand_likes 
-                WHERE brand_name = %s AND user_hash = %s
-            """, (brand_name, user_hash))
-            
-            if cursor.fetchone():
+            changed, like_count, _ = BrandLike._change_like(brand_name, user_hash, ip_address, user_agent, mode='like')
+            if not changed:
                 return False, "您已经点赞过了"
-            
-            # 添加点赞记录
-            cursor.execute("""
-                INSERT INTO brand_likes (brand_name, user_hash, ip_address, user_agent)
-                VALUES (%s, %s, %s, %s)
-            """, (brand_name, user_hash, ip_address, user_agent))
-            
-            # 更新统计
-            cursor.execute("""
-                INSERT INTO brand_like_stats (brand_name, like_count)
-                VALUES (%s, 1)
-                ON DUPLICATE KEY UPDATE like_count = like_count + 1
-            """, (brand_name,))
-            
-            connection.commit()
-            
-            # 获取最新点赞数
-            cursor.execute("""
-                SELECT like_count FROM brand_like_stats WHERE brand_name = %s
-            """, (brand_name,))
-            
-            result = cursor.fetchone()
-            like_count = result['like_count'] if result else 1
-            
             return True, like_count
             
         except Exception as e:
             logger.error(f"添加点赞记录失败: {e}")
             return False, str(e)
-        finally:
-            if 'connection' in locals():
-                connection.close()
     
     @staticmethod
     def check_user_liked(brand_name, user_hash):
-        """检查用户是否已点赞"""
+        """检查用户是否已点赞（过滤器能确定时不访问数据库）"""
+        liked = like_filter.lookup(brand_name, user_hash)
+        if liked is not None:
+            return liked
+        
         try:
             connection = get_db_connection()
             cursor = connection.cursor()
@@ -133,7 +167,9 @@ class BrandLike:
                 WHERE brand_name = %s AND user_hash = %s
             """, (brand_name, user_hash))
             
-            return cursor.fetchone() is not None
+            liked = cursor.fetchone() is not None
+            like_filter.remember(brand_name, user_hash, liked)
+            return liked
             
         except Exception as e:
             logger.error(f"检查点赞状态失败: {e}")
@@ -142,6 +178,38 @@ class BrandLike:
             if 'connection' in locals():
                 connection.close()
     
+    @staticmethod
+    def get_liked_brands(brand_user_hashes):
+        """批量检查点赞状态（过滤器无法确定的部分用一次IN查询）
+
+        brand_user_hashes: [(品牌名, 用户标识)]，返回其中已点赞的品牌名集合
+        """
+        known, unknown = like_filter.lookup_many(set(brand_user_hashes))
+        liked = {brand_name for (brand_name, _), is_liked in known.items() if is_liked}
+        if not unknown:
+            return liked
+        
+        connection = get_db_connection()
+        try:
+            cursor = connection.cursor()
+            user_hashes = list({user_hash for _, user_hash in unknown})
+            placeholders = ', '.join(['%s'] * len(user_hashes))
+            cursor.execute(f"""
+                SELECT brand_name, user_hash FROM brand_likes
+                WHERE user_hash IN ({placeholders})
+            """, user_hashes)
+            
+            found = {(row['brand_name'], row['user_hash']) for row in cursor.fetchall()}
+        finally:
+            connection.close()
+        
+        for brand_name, user_hash in unknown:
+            is_liked = (brand_name, user_hash) in found
+            like_filter.remember(brand_name, user_hash, is_liked)
+            if is_liked:
+                liked.add(brand_name)
+        return liked
+    
     @staticmethod
     def get_like_count(brand_name):
         """获取布料点赞数"""
@@ -149,12 +217,7 @@ class BrandLike:
             connection = get_db_connection()
             cursor = connection.cursor()
             
-            cursor.execute("""
-                SELECT like_count FROM brand_like_stats WHERE brand_name = %s
-            """, (brand_name,))
-            
-            result = cursor.fetchone()
-            return result['like_count'] if result else 0
+            return BrandLike._read_count(cursor, brand_name)
             
         except Exception as e:
             logger.error(f"获取点赞数失败: {e}")
@@ -163,6 +226,28 @@ class BrandLike:
             if 'connection' in locals():
                 connection.close()
     
+    @staticmethod
+    def get_like_counts(brand_names):
+        """批量获取点赞数（一次IN查询），返回 {品牌名: 点赞数}，没有记录的品牌为0"""
+        brand_names = list(dict.fromkeys(brand_names))
+        if not brand_names:
+            return {}
+        
+        connection = get_db_connection()
+        try:
+            cursor = connection.cursor()
+            placeholders = ', '.join(['%s'] * len(brand_names))
+            cursor.execute(f"""
+                SELECT brand_name, like_count FROM brand_like_stats
+                WHERE brand_name IN ({placeholders})
+            """, brand_names)
+            
+            counts = {name: 0 for name in brand_names}
+            counts.update({row['brand_name']: row['like_count'] for row in cursor.fetchall()})
+            return like_counter.apply(counts, brand_names)
+        finally:
+            connection.close()
+    
     @staticmethod
     def get_popular_brands(limit=10):
         """获取最受欢迎的布料"""
@@ -190,75 +275,37 @@ class BrandLike:
     def remove_like(brand_name, user_hash):
         """取消点赞记录"""
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
-            
-            # 检查是否已经点赞过
-            cursor.execute("""
-                SELECT id FROM brand_likes 
-                WHERE brand_name = %s AND user_hash = %s
-            """, (brand_name, user_hash))
-            
-            if not cursor.fetchone():
+            changed, like_count, _ = BrandLike._change_like(brand_name, user_hash, mode='unlike')
+            if not changed:
                 return False, "您还没有点赞过"
-            
-            # 删除点赞记录
-            cursor.execute("""
-                DELETE FROM brand_likes 
-                WHERE brand_name = %s AND user_hash = %s
-            """, (brand_name, user_hash))
-            
-            # 更新统计
-            cursor.execute("""
-                UPDATE brand_like_stats 
-                SET like_count = GREATEST(like_count - 1, 0)
-                WHERE brand_name = %s
-            """, (brand_name,))
-            
-            connection.commit()
-            
-            # 获取最新点赞数
-            cursor.execute("""
-                SELECT like_count FROM brand_like_stats WHERE brand_name = %s
-            """, (brand_name,))
-            
-            result = cursor.fetchone()
-            like_count = result['like_count'] if result else 0
-            
             return True, like_count
             
         except Exception as e:
             logger.error(f"取消点赞记录失败: {e}")
             return False, str(e)
-        finally:
-            if 'connection' in locals():
-                connection.close()
 
     @staticmethod
     def toggle_like(brand_name, user_hash, ip_address=None, user_agent=None):
-        """切换点赞状态（点赞/取消点赞）"""
+        """切换点赞状态（点赞/取消点赞），一个事务内完成，返回 (是否成功, 最新点赞数, 是否已点赞)"""
         try:
-            # 检查当前状态
-            has_liked = BrandLike.check_user_liked(brand_name, user_hash)
-            
-            if has_liked:
-                # 已点赞，执行取消点赞
-                success, result = BrandLike.remove_like(brand_name, user_hash)
-                return success, result, False  # False表示取消点赞
-            else:
-                # 未点赞，执行点赞
-                success, result = BrandLike.add_like(brand_name, user_hash, ip_address, user_agent)
-                return success, result, True   # True表示点赞
+            _, like_count, is_liked = BrandLike._change_like(brand_name, user_hash, ip_address, user_agent)
+            # 取消时记录已被并发请求删除：结果同样是未点赞
+            return True, like_count, is_liked
                 
+        except pymysql.err.OperationalError as e:
+            logger.error(f"切换点赞状态失败: {e}")
+            if e.args and e.args[0] in LOCK_ERRORS:
+                return False, "操作太频繁，请稍后重试", False
+            return False, str(e), False
         except Exception as e:
             logger.error(f"切换点赞状态失败: {e}")
             return False, str(e), False
 
     @staticmethod
     def get_all_like_counts():
-        """获取所有品牌的点赞数"""
+        """获取所有品牌的点赞数（查询失败时抛出异常，由调用方决定是否沿用旧数据）"""
+        connection = get_db_connection()
         try:
-            connection = get_db_connection()
             cursor = connection.cursor()
             
             cursor.execute("""
@@ -269,11 +316,7 @@ class BrandLike:
             """)
             
             results = cursor.fetchall()
-            return {row['brand_name']: row['like_count'] for row in results}
-            
-        except Exception as e:
-            logger.error(f"获取所有点赞数失败: {e}")
-            return {}
+            counts = {row['brand_name']: row['like_count'] for row in results}
+            return {name: count for name, count in like_counter.apply(counts).items() if count > 0}
         finally:
-            if 'connection' in locals():
-                connection.close() 
\ No newline at end of file
+            connection.close() 
\ No newline at end of file
@@ -26,6 +26,11 @@ class Product(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, comment='创建时间')
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
     
+    # 索引：产品列表按(updated_at, id)倒序做游标分页
+    __table_args__ = (
+        db.Index('idx_updated_at_id', 'updated_at', 'id'),
+    )
+    
     def __init__(self, **kwargs):
         """初始化"""
         super(Product, self).__init__(**kwargs)
@@ -50,6 +55,16 @@ class Product(db.Model):
         """字符串表示"""
         return f'<Product {self.brand_name}>'
     
+    @classmethod
+    def ensure_indexes(cls):
+        """为已存在的products表补建模型中声明的索引（create_all不会修改已有的表）"""
+        from sqlalchemy import inspect
+        existing = {index['name'] for index in inspect(db.engine).get_indexes(cls.__tablename__)}
+        for index in cls.__table__.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                print(f"✅ 已创建索引: {cls.__tablename__}.{index.name}")
+    
     @classmethod
     def get_by_brand_name(cls, brand_name):
         """根据品牌名获取产品"""
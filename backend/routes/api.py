@@ -6,6 +6,7 @@
 
 import os
 import time
+from datetime import datetime
 from functools import wraps
 from flask import Blueprint, jsonify, request, send_file, abort, current_app
 
@@ -23,8 +24,16 @@ from backend.models.brand_like import BrandLike
 from backend.services.image_service import ImageService
 from backend.services.product_service import ProductService
 from backend.services.cache_service import cached, cache_service, DatabaseQueryCache
+from backend.services.brand_catalog import brand_catalog, normalize_listing, parse_projection
+from backend.services.facet_index import parse_selection
+from backend.services.search_index import search_index
+from backend.services.like_counter import like_counter
+from backend.services.like_filter import like_filter
 from backend.utils.logger import log_access
-from backend.utils.cache_control import smart_cache, cache_control
+from backend.utils.cache_control import cache_control, versioned_etag
+from backend.utils.compression import set_body
+from backend.utils.cursor import decode_cursor, encode_cursor
+from backend.utils.db_pool import mysql_pool
 
 def handle_errors(f):
     """错误处理装饰器"""
@@ -40,184 +49,92 @@ def handle_errors(f):
             }), 500
     return decorated_function
 
+# 只允许本机直接访问的内部状态接口（经反向代理转发的请求带X-Forwarded-For/X-Real-IP，不算本机）
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+
+def local_only(f):
+    """只允许本机直接访问，其他请求返回403"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        proxied = request.headers.get('X-Forwarded-For') or request.headers.get('X-Real-IP')
+        if proxied or request.remote_addr not in LOCAL_ADDRESSES:
+            return jsonify({
+                'success': False,
+                'error': '仅允许本机访问'
+            }), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
 # 创建蓝图
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# /api/brands/batch 单次请求的品牌数上限
+BATCH_BRAND_LIMIT = 50
+
+def _snapshot_response(key, build):
+    """从品牌快照返回预编码的JSON响应：先用ETag应答If-None-Match，命中缓存时不做任何序列化、哈希和压缩
+
+    key: 规范化后的请求参数；build: 未缓存时生成响应数据的函数
+    """
+    snapshot = brand_catalog.get()
+    etag = snapshot.etag_for(key)
+
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag, weak=True)
+    else:
+        encoded = snapshot.encoded(key, lambda: jsonify(build(snapshot)).get_data())
+        response = current_app.response_class(mimetype='application/json')
+        response.set_etag(etag, weak=True)
+        set_body(response, encoded.body)  # 按Accept-Encoding返回预压缩的字节
+
+    # 304和200声明相同的Vary
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=60, must-revalidate'
+    return response
+
 @api_bp.route('/images')
 @log_access
-@smart_cache
 @handle_errors
 def get_images():
-    """获取图片信息，支持分页"""
+    """获取图片信息，支持页码分页和游标分页（cursor参数，取自上一页的pagination.next_cursor）
+
+    分面筛选：year/material/theme_series/print_size，同一分面多选用重复参数或逗号分隔；
+    有筛选条件或facets=true时响应附带当前条件下的分面计数（facets）
+    字段投影：fields=name,year,images.thumbnail 只返回指定字段；images=cover|none|all 控制每个品牌返回的图片
+    v=2：规范化格式，图片只出现一次，品牌通过图片ID引用（前端用api.rehydrateListing还原）
+    """
     # 获取分页参数
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 12, type=int)  # 默认每页12个品牌
     load_all = request.args.get('load_all', 'false').lower() == 'true'
+    cursor = request.args.get('cursor')
+    selection = parse_selection(request.args)
+    with_facets = request.args.get('facets', 'false').lower() == 'true'
+    normalized = request.args.get('v', 1, type=int) == 2
     
     # 限制每页数量，避免过大请求
-    per_page = min(per_page, 50)
-    
-    return _get_images_with_pagination(page, per_page, load_all)
-
-def _get_images_with_pagination(page, per_page, load_all):
-    """获取所有图片信息"""
-    image_service = ImageService()
-    images = image_service.get_all_images()
-    
-    # 从数据库获取产品信息
-    # Product已经在文件顶部导入，无需重复导入
-    
-    # 按品牌分组，合并同名不同颜色的品牌
-    brands = {}
-    brand_products = {}  # 存储品牌对应的产品信息
-    
-    # 获取所有产品信息
-    try:
-        products = Product.query.all()
-        print(f"🔍 数据库查询到 {len(products)} 个产品")
-        for product in products:
-            brand_products[product.brand_name] = product
-            # 调试输出新品牌
-            if product.brand_name in ['江南春', '有才华']:
-                print(f"🎯 找到目标品牌: {product.brand_name} - {product.year} - {product.theme_series}")
-    except Exception as e:
-        print(f"数据库查询错误: {e}")
-        products = []
-    
-    # 首先按基础品牌名分组
-    base_brands = {}
-    for img in images:
-        original_brand_name = img['brand_name']
-        
-        # 提取基础品牌名（去掉颜色部分）
-        base_brand_name = original_brand_name
-        if '(' in original_brand_name and ')' in original_brand_name:
-            base_brand_name = original_brand_name.split('(')[0]
-        
-        if base_brand_name not in base_brands:
-            base_brands[base_brand_name] = []
-        base_brands[base_brand_name].append(img)
-    
-    # 为每个基础品牌创建合并后的品牌信息
-    for base_brand_name, brand_images in base_brands.items():
-        # 收集所有颜色
-        brand_colors = set()
-        for img in brand_images:
-            if '(' in img['brand_name'] and ')' in img['brand_name']:
-                color = img['brand_name'].split('(')[1].split(')')[0]
-                brand_colors.add(color)
-        
-        # 构建显示的品牌名称
-        if brand_colors:
-            display_brand_name = f"{base_brand_name}({'/'.join(sorted(brand_colors))})"
-        else:
-            display_brand_name = base_brand_name
-        
-        # 从数据库获取产品信息（优先使用完整品牌名，其次使用基础品牌名）
-        product_info = None
-        for img in brand_images:
-            if img['brand_name'] in brand_products:
-                product_info = brand_products[img['brand_name']]
-                break
-        
-        if not product_info and base_brand_name in brand_products:
-            product_info = brand_products[base_brand_name]
-        
-        if product_info:
-            year = product_info.year
-            if not year and product_info.publish_month:
-                try:
-                    year = int(product_info.publish_month[:4])
-                except:
-                    year = 2024
-            elif not year:
-                year = 2024
-                
-            brands[display_brand_name] = {
-                'name': display_brand_name,
-                'images': brand_images,
-                'year': year,
-                'material': product_info.material or '棉麻',
-                'theme_series': product_info.theme_series or '经典系列',
-                'print_size': product_info.print_size or '循环印花料',
-                'inspiration_origin': product_info.inspiration_origin or f'{display_brand_name}的设计灵感来源于传统文化与现代美学的融合。',
-                'publish_month': product_info.publish_month or '2024-01'
-            }
-        else:
-            brands[display_brand_name] = {
-                'name': display_brand_name,
-                'images': brand_images,
-                'year': 2024,
-                'material': '棉麻',
-                'theme_series': '经典系列',
-                'print_size': '循环印花料',
-                'inspiration_origin': f'{display_brand_name}的设计灵感来源于传统文化与现代美学的融合。',
-                'publish_month': '2024-01'
-            }
-    
-    # 转换为列表格式并按发布时间排序
-    brand_list = []
+    per_page = max(min(per_page, 50), 1)
     
-    # 批量获取所有品牌的点赞数
     try:
-        all_like_counts = BrandLike.get_all_like_counts()
-    except Exception as e:
-        print(f"获取点赞数失败: {e}")
-        all_like_counts = {}
-    
-    for brand_name, brand_data in brands.items():
-        # 获取基础品牌名用于查询点赞数
-        base_brand_name = brand_name.split('(')[0] if '(' in brand_name else brand_name
-        like_count = all_like_counts.get(base_brand_name, 0)
-        
-        brand_list.append({
-            **brand_data,
-            'imageCount': len(brand_data['images']),
-            'like_count': like_count  # 添加点赞数
-        })
-    
-    # 按发布年份和月份排序（最新的在前）
-    brand_list.sort(key=lambda x: (
-        int(x.get('year', 2024)), 
-        x.get('publish_month', '2024-01')
-    ), reverse=True)
-    
-    # 分页处理
-    total_brands = len(brand_list)
-    total_images = len(images)
-    
-    if load_all:
-        # 加载所有数据（用于筛选等功能）
-        paginated_brands = brand_list
-        current_page = 1
-        total_pages = 1
-        has_next = False
-        has_prev = False
-    else:
-        # 分页加载
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_brands = brand_list[start_idx:end_idx]
-        
-        total_pages = (total_brands + per_page - 1) // per_page
-        has_next = page < total_pages
-        has_prev = page > 1
-        current_page = page
-    
-    return jsonify({
-        'success': True,
-        'images': images if load_all else [],  # 分页时不返回所有图片数据
-        'brands': paginated_brands,
-        'pagination': {
-            'current_page': current_page,
-            'per_page': per_page,
-            'total_brands': total_brands,
-            'total_pages': total_pages,
-            'has_next': has_next,
-            'has_prev': has_prev
-        },
-        'total': total_images
-    })
+        projection = parse_projection(request.args)
+        cursor_key = decode_cursor(cursor, (int, str, str)) if cursor else None
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    output = normalize_listing if normalized else (lambda result: result)
+    
+    if cursor_key:
+        return _snapshot_response(
+            ('images_after', cursor_key, per_page, selection, with_facets, projection, normalized),
+            lambda snapshot: output(snapshot.get_page_after(cursor_key, per_page, selection, with_facets, projection))
+        )
+    
+    # 直接在品牌快照上分页，快照由后台按数据版本重建；同一快照内相同参数的响应只编码一次
+    return _snapshot_response(
+        ('images', page, per_page, load_all, selection, with_facets, projection, normalized),
+        lambda snapshot: output(snapshot.get_page(page, per_page, load_all, selection, with_facets, projection))
+    )
 
 @api_bp.route('/filters')
 @log_access
@@ -305,7 +222,7 @@ def get_filters():
 
 @api_bp.route('/brand/<path:brand_name>')
 @log_access
-@cached(ttl=1800, key_prefix='api_brand')  # 30分钟缓存，大幅提升性能
+@versioned_etag(tag_source=brand_catalog.get_tag)
 @handle_errors
 def get_brand_detail(brand_name):
     """获取品牌详细信息"""
@@ -313,26 +230,12 @@ def get_brand_detail(brand_name):
     
     # URL解码品牌名
     decoded_brand_name = unquote(brand_name)
-    print(f"API请求品牌详情: {brand_name} -> 解码后: {decoded_brand_name}")
-    
-    # 从品牌名中提取基础品牌名（去掉花色信息）
-    base_brand_name = decoded_brand_name
-    if '(' in decoded_brand_name:
-        base_brand_name = decoded_brand_name.split('(')[0]
-    
-    print(f"基础品牌名: {base_brand_name}")
     
-    # 使用产品服务获取品牌信息
-    product_service = ProductService()
-    brand_info = product_service.get_brand_detail(decoded_brand_name)
-    
-    # 如果使用完整品牌名没找到，尝试使用基础品牌名
-    if not brand_info and base_brand_name != decoded_brand_name:
-        print(f"使用完整品牌名未找到，尝试基础品牌名: {base_brand_name}")
-        brand_info = product_service.get_brand_detail(base_brand_name)
-    
-    if not brand_info:
+    # 在品牌快照上查找（精确 -> 基础品牌名 -> 模糊匹配），不访问数据库
+    result = brand_catalog.get().get_brand_detail(decoded_brand_name)
+    if not result:
         print(f"品牌不存在: {decoded_brand_name}")
+        base_brand_name = decoded_brand_name.split('(')[0] if '(' in decoded_brand_name else decoded_brand_name
         return jsonify({
             'success': False,
             'error': f'品牌不存在: {decoded_brand_name}',
@@ -340,39 +243,64 @@ def get_brand_detail(brand_name):
             'base_brand': base_brand_name
         }), 404
     
-    # 从brand_info中获取images
-    brand_images = brand_info.get('images', [])
-    
-    # 构建返回数据，确保字段名称正确
-    result = {
-        'success': True,
-        'brand_info': {
-            'name': decoded_brand_name,  # 返回解码后的品牌名
-            'base_name': base_brand_name,  # 返回基础品牌名
-            **brand_info  # 包含所有品牌信息
-        },
-        'images': brand_images,
-        'imageCount': len(brand_images)
-    }
-    
-    # 添加点赞数
+    return jsonify(result)
+
+@api_bp.route('/brands/batch', methods=['GET', 'POST'])
+@log_access
+@handle_errors
+def get_brands_batch():
+    """批量获取品牌详情：在品牌快照上一次解析所有品牌，点赞数用一次IN查询获取
+
+    GET ?names=品牌A&names=品牌B 或 POST {"names": [...]}，最多BATCH_BRAND_LIMIT个
+    返回 {brands: {请求的品牌名: 详情（同/api/brand，不含success）}, missing: [找不到的品牌名]}
+    """
+    if request.method == 'POST':
+        names = (request.get_json(silent=True) or {}).get('names') or []
+    else:
+        names = request.args.getlist('names')
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        return jsonify({'success': False, 'error': 'names必须是品牌名列表'}), 400
+    
+    names = list(dict.fromkeys(name.strip() for name in names if name.strip()))
+    if not names:
+        return jsonify({'success': False, 'error': '请提供品牌名'}), 400
+    if len(names) > BATCH_BRAND_LIMIT:
+        return jsonify({'success': False, 'error': f'一次最多查询{BATCH_BRAND_LIMIT}个品牌'}), 400
+    
+    snapshot = brand_catalog.get()
+    details = {name: snapshot.get_brand_detail(name) for name in names}
+    found = {name: detail for name, detail in details.items() if detail}
+    
+    # 快照中的点赞数可能落后于最新写入，这里统一刷新
+    base_names = [detail['brand_info']['base_name'] for detail in found.values()]
     try:
-        like_count = BrandLike.get_like_count(base_brand_name)
-        result['brand_info']['like_count'] = like_count
-        print(f"获取点赞数成功: {like_count}")
+        like_counts = BrandLike.get_like_counts(base_names)
     except Exception as e:
-        print(f"获取点赞数失败: {e}")
-        result['brand_info']['like_count'] = 0
+        print(f"批量获取点赞数失败，使用快照数据: {e}")
+        like_counts = {}
     
-    print(f"返回品牌详情成功: {brand_info.get('name', '未知')}, 图片数量: {len(brand_images)}")
-    return jsonify(result)
+    brands = {}
+    for name, detail in found.items():
+        base_name = detail['brand_info']['base_name']
+        brands[name] = {
+            'brand_info': {**detail['brand_info'],
+                           'like_count': like_counts.get(base_name, detail['brand_info']['like_count'])},
+            'images': detail['images'],
+            'imageCount': detail['imageCount']
+        }
+    
+    return jsonify({
+        'success': True,
+        'brands': brands,
+        'missing': [name for name in names if name not in found]
+    })
 
 @api_bp.route('/products')
 @handle_errors
 def get_products():
     """获取产品列表（用于管理界面）"""
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
     search = request.args.get('search', '')
     
     filters = {}
@@ -383,6 +311,34 @@ def get_products():
     if request.args.get('material'):
         filters['material'] = request.args.get('material')
     
+    cursor = request.args.get('cursor')
+    if cursor:
+        # 游标分页：按(updated_at, id)从上一页最后一个产品之后继续，不使用OFFSET
+        try:
+            updated_at, product_id = decode_cursor(cursor, (str, int))
+            cursor_key = (datetime.fromisoformat(updated_at), product_id)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        result = ProductService.get_products_after(
+            cursor=cursor_key, per_page=per_page, search=search, filters=filters
+        )
+        if result is None:
+            return jsonify({
+                'success': False,
+                'error': '获取产品列表失败'
+            }), 500
+        items, has_next = result
+        return jsonify({
+            'success': True,
+            'products': [product.to_dict() for product in items],
+            'pagination': {
+                'per_page': per_page,
+                'total': ProductService.count_products(search, filters),
+                'has_next': has_next,
+                'next_cursor': _product_cursor(items[-1]) if has_next else None
+            }
+        })
+    
     products = ProductService.get_all_products(
         page=page, per_page=per_page, search=search, filters=filters
     )
@@ -402,10 +358,42 @@ def get_products():
             'per_page': products.per_page,
             'total': products.total,
             'has_next': products.has_next,
-            'has_prev': products.has_prev
+            'has_prev': products.has_prev,
+            # 之后可以改用游标继续翻页
+            'next_cursor': _product_cursor(products.items[-1]) if products.has_next and products.items else None
         }
     })
 
+def _product_cursor(product):
+    return encode_cursor(product.updated_at.isoformat(), product.id)
+
+@api_bp.route('/search')
+@handle_errors
+def search_products():
+    """产品全文检索（中文二元组分词 + BM25排序），结果直接来自内存索引"""
+    query = request.args.get('q', '').strip()
+    limit = max(min(request.args.get('limit', 20, type=int), 100), 1)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    if not query:
+        return jsonify({
+            'success': False,
+            'error': '请输入搜索关键词'
+        }), 400
+    
+    start = time.perf_counter()
+    total, hits = search_index.search(query, limit=limit, offset=offset)
+    
+    return jsonify({
+        'success': True,
+        'query': query,
+        'products': [{**product, 'score': round(score, 4)} for product, score in hits],
+        'total': total,
+        'limit': limit,
+        'offset': offset,
+        'took_ms': round((time.perf_counter() - start) * 1000, 3)
+    })
+
 @api_bp.route('/statistics')
 @handle_errors
 def get_statistics():
@@ -418,56 +406,69 @@ def get_statistics():
     })
 
 # 文件服务路由
+def _resolve_image_path(image_service, filepath):
+    """把请求路径解析为图片目录下的文件，返回(绝对路径, 索引中的(mtime_ns, size))；
+    越界或不存在时返回(None, None)。已登记的图片不再检查文件是否存在，
+    索引信息只作为校验值缓存的提示，发送时仍会定期stat文件"""
+    from werkzeug.security import safe_join
+    
+    full_path = safe_join(image_service.images_dir, filepath)
+    if full_path is None:
+        return None, None
+    
+    stats = image_service.catalog.get_file_stats(filepath)
+    if stats is None and not os.path.isfile(full_path):
+        return None, None
+    return full_path, stats
+
+def _image_not_found(filepath):
+    return jsonify({
+        'success': False,
+        'error': f'图片不存在: {filepath}'
+    }), 404
+
 @api_bp.route('/view/<path:filepath>')
 @handle_errors
 def view_image(filepath):
-    """查看图片"""
-    import os
-    from flask import send_file, abort
-    
-    # 获取前端静态图片目录
-    current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    project_root = os.path.dirname(current_dir)
-    images_dir = os.path.join(project_root, 'frontend', 'static', 'images')
-    
-    # 构建完整路径
-    full_path = os.path.join(images_dir, filepath)
-    
-    print(f"🖼️ 图片请求: {filepath}")
-    print(f"🖼️ 完整路径: {full_path}")
-    print(f"🖼️ 文件存在: {os.path.exists(full_path)}")
-    
-    # 检查文件是否存在
-    if not os.path.exists(full_path):
-        print(f"❌ 文件不存在: {full_path}")
-        abort(404)
-    
-    # 检查文件是否在允许的目录内（安全检查）
-    if not os.path.abspath(full_path).startswith(os.path.abspath(images_dir)):
-        print(f"❌ 安全检查失败: {full_path}")
-        abort(403)
+    """查看图片（支持条件请求和Range；配置了IMAGE_OFFLOAD_MODE且经由代理访问时，由代理直接发送文件）"""
+    image_service = ImageService()
+    full_path, stats = _resolve_image_path(image_service, filepath)
+    if full_path is None:
+        return _image_not_found(filepath)
     
-    print(f"✅ 返回图片文件: {full_path}")
-    return send_file(full_path)
+    # 带w/h/q/fmt参数时返回缩放后的版本
+    from backend.services.image_resize_cache import parse_resize_params, get_resize_cache
+    from backend.utils.file_offload import send_file_offloaded
+    try:
+        params = parse_resize_params(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if params:
+        resize_cache = get_resize_cache()
+        cached_path, mimetype = resize_cache.get(full_path, params, stats)
+        # 原图修改后缓存键随mtime变化，ETag也随之变化
+        return send_file_offloaded(cached_path, resize_cache.cache_dir,
+                                   current_app.config['IMAGE_OFFLOAD_CACHE_PREFIX'],
+                                   mimetype=mimetype, max_age=3600)
+    
+    from backend.services.image_variants import send_negotiated
+    return send_negotiated(full_path, image_service.images_dir, current_app.config['IMAGE_OFFLOAD_PREFIX'],
+                           stats=stats)
 
 @api_bp.route('/download/<path:filepath>')
 @handle_errors
 def download_image(filepath):
-    """下载图片"""
-    from config.config import Config
-    
-    # 构建完整路径
-    full_path = os.path.join(Config.UPLOAD_FOLDER, filepath)
+    """下载原图（支持断点续传）"""
+    from backend.utils.file_offload import send_file_offloaded
     
-    # 检查文件是否存在
-    if not os.path.exists(full_path):
-        abort(404)
-    
-    # 检查文件是否在允许的目录内（安全检查）
-    if not os.path.abspath(full_path).startswith(os.path.abspath(Config.UPLOAD_FOLDER)):
-        abort(403)
+    image_service = ImageService()
+    full_path, stats = _resolve_image_path(image_service, filepath)
+    if full_path is None:
+        return _image_not_found(filepath)
     
-    return send_file(full_path, as_attachment=True)
+    return send_file_offloaded(full_path, image_service.images_dir, current_app.config['IMAGE_OFFLOAD_PREFIX'],
+                               as_attachment=True, stats=stats)
 
 @api_bp.route('/health')
 def health_check():
@@ -488,6 +489,18 @@ def get_cache_stats():
         'cache_stats': stats
     })
 
+@api_bp.route('/db/pool/stats')
+@handle_errors
+@local_only
+def get_db_pool_stats():
+    """获取MySQL连接池状态和取出指标，以及点赞计数写缓冲、点赞状态过滤器的状态（仅限本机访问）"""
+    return jsonify({
+        'success': True,
+        'pool_stats': mysql_pool.stats(),
+        'like_counter': like_counter.get_stats(),
+        'like_filter': like_filter.get_stats()
+    })
+
 @api_bp.route('/cache/clear', methods=['POST'])
 @handle_errors
 def clear_cache():
@@ -645,6 +658,13 @@ def not_found(error):
         'error': '资源不存在'
     }), 404
 
+def _like_user_hash(base_brand_name):
+    """点赞用户标识：IP + User-Agent + 基础品牌名的MD5（同一访客在每个品牌下的标识不同）"""
+    import hashlib
+    client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', ''))
+    user_agent = request.environ.get('HTTP_USER_AGENT', '')
+    return hashlib.md5(f"{client_ip}_{user_agent}_{base_brand_name}".encode()).hexdigest()
+
 @api_bp.route('/like/card/<path:brand_name>', methods=['POST'])
 @handle_errors
 def like_brand_card(brand_name):
@@ -661,12 +681,12 @@ def like_brand_card(brand_name):
         user_agent = request.environ.get('HTTP_USER_AGENT', '')
         
         # 创建唯一标识（使用基础品牌名）
-        import hashlib
-        unique_id = hashlib.md5(f"{client_ip}_{user_agent}_{base_brand_name}".encode()).hexdigest()
+        unique_id = _like_user_hash(base_brand_name)
         
         # 使用数据库存储点赞记录
         try:
             from backend.models.brand_like import BrandLike
+            # 点赞数由like_counter批量写回，写回后再递增likes版本，这里不再每次触发快照刷新
             success, like_count, is_liked = BrandLike.toggle_like(base_brand_name, unique_id, client_ip, user_agent)
             
             if not success:
@@ -743,8 +763,7 @@ def get_brand_like_count(brand_name):
         user_agent = request.environ.get('HTTP_USER_AGENT', '')
         
         # 创建唯一标识（使用基础品牌名）
-        import hashlib
-        unique_id = hashlib.md5(f"{client_ip}_{user_agent}_{base_brand_name}".encode()).hexdigest()
+        unique_id = _like_user_hash(base_brand_name)
         
         # 使用数据库查询点赞状态
         try:
@@ -779,6 +798,56 @@ def get_brand_like_count(brand_name):
             'error': str(e)
         }), 500
 
+@api_bp.route('/like/status', methods=['GET', 'POST'])
+@handle_errors
+def get_like_statuses():
+    """批量获取当前访客对多个布料的点赞状态和点赞数
+
+    GET ?names=品牌A&names=品牌B 或 POST {"names": [...]}，最多BATCH_BRAND_LIMIT个
+    点赞状态用一次 user_hash IN (...) 查询，点赞数用一次 brand_name IN (...) 查询并叠加尚未写回的增量
+    返回 {statuses: {请求的品牌名: {liked, like_count}}}
+    """
+    if request.method == 'POST':
+        names = (request.get_json(silent=True) or {}).get('names') or []
+    else:
+        names = request.args.getlist('names')
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        return jsonify({'success': False, 'error': 'names必须是品牌名列表'}), 400
+    
+    names = list(dict.fromkeys(name.strip() for name in names if name.strip()))
+    if not names:
+        return jsonify({'success': False, 'error': '请提供品牌名'}), 400
+    if len(names) > BATCH_BRAND_LIMIT:
+        return jsonify({'success': False, 'error': f'一次最多查询{BATCH_BRAND_LIMIT}个品牌'}), 400
+    
+    # 提取基础品牌名（去掉颜色部分）
+    base_names = {name: name.split('(')[0] if '(' in name else name for name in names}
+    user_hashes = {base_name: _like_user_hash(base_name) for base_name in base_names.values()}
+    
+    try:
+        liked = BrandLike.get_liked_brands(user_hashes.items())
+    except Exception as db_error:
+        print(f"数据库查询失败，回退到缓存: {db_error}")
+        liked = {base_name for base_name, unique_id in user_hashes.items()
+                 if cache_service.get(f"like_{unique_id}")}
+    
+    # 点赞数与/like/card、/brands/batch一致：数据库中的点赞数叠加like_counter中尚未写回的增量
+    try:
+        like_counts = BrandLike.get_like_counts(base_names.values())
+    except Exception as db_error:
+        print(f"数据库查询失败，回退到品牌快照: {db_error}")
+        like_counts = like_counter.apply(dict(brand_catalog.get().like_counts), base_names.values())
+    return jsonify({
+        'success': True,
+        'statuses': {
+            name: {
+                'liked': base_name in liked,
+                'like_count': like_counts.get(base_name, 0)
+            }
+            for name, base_name in base_names.items()
+        }
+    })
+
 @api_bp.errorhandler(500)
 def internal_error(error):
     return jsonify({
@@ -0,0 +1,636 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+品牌目录读模型
+把图片索引、产品信息和点赞数合并成一个不可变的品牌快照（按基础品牌名合并颜色、补齐产品元数据、预先排序），
+/api/images 和 /api/brand 直接在快照上查找；产品、图片或点赞数据版本变化时在后台线程重建并原子替换。
+快照还缓存编码好的响应体（含压缩版本）和ETag，随快照一起失效
+
+数据版本号只在本进程内递增。多进程部署（如gunicorn -w 4）时，其他进程写入的产品/点赞
+在本进程的快照中最多滞后MAX_AGE秒（期间按旧ETag返回304），可用BRAND_CATALOG_MAX_AGE缩短
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from itertools import islice
+from types import MappingProxyType
+from typing import Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+from backend.services.facet_index import FacetIndex, Selection
+
+# 快照依赖的数据版本
+NAMESPACES = ('images', 'products', 'likes')
+
+# 没有产品信息时的默认展示字段
+DEFAULT_YEAR = 2024
+DEFAULT_MATERIAL = '棉麻'
+DEFAULT_THEME_SERIES = '经典系列'
+DEFAULT_PRINT_SIZE = '循环印花料'
+DEFAULT_PUBLISH_MONTH = '2024-01'
+
+
+def base_brand_name(brand_name: str) -> str:
+    """去掉颜色部分的基础品牌名"""
+    return brand_name.split('(')[0] if '(' in brand_name else brand_name
+
+
+def brand_sort_key(brand: Dict) -> Tuple[int, str, str]:
+    """品牌排序键：年份倒序、发布月份倒序、品牌名正序"""
+    return int(brand['year']), brand['publish_month'], brand['name']
+
+
+def _precedes(a: Tuple[int, str, str], b: Tuple[int, str, str]) -> bool:
+    """按品牌排序规则a是否排在b之前"""
+    if a[0] != b[0]:
+        return a[0] > b[0]
+    if a[1] != b[1]:
+        return a[1] > b[1]
+    return a[2] < b[2]
+
+
+# 编码好的响应：JSON字节（及其按需生成的压缩版本）+ ETag
+EncodedResponse = namedtuple('EncodedResponse', ['body', 'etag'])
+
+# 列表中品牌记录的字段
+BRAND_FIELDS = ('name', 'images', 'year', 'material', 'theme_series', 'print_size',
+                'inspiration_origin', 'publish_month', 'imageCount', 'like_count')
+# 图片返回方式：全部 / 只返回封面 / 不返回
+IMAGE_MODES = ('all', 'cover', 'none')
+# 封面优先级（与前端getBrandCover一致）
+COVER_PRIORITY = ('概念图', '设计图', '成衣图', '布料图', '模特图', '买家秀图', '其他')
+
+# 字段投影：fields为品牌字段（None表示全部），image_fields为图片字段（None表示全部）
+Projection = namedtuple('Projection', ['fields', 'image_fields', 'images'])
+
+
+def parse_projection(args) -> Optional[Projection]:
+    """解析 fields=name,year,images.thumbnail 和 images=cover|none|all，未指定时返回None（完整记录）
+
+    name和imageCount总是返回；images.前缀的字段作用于图片记录
+    """
+    mode = (args.get('images') or 'all').lower()
+    if mode not in IMAGE_MODES:
+        raise ValueError(f"不支持的images参数: {mode}")
+
+    fields, image_fields = None, None
+    raw = args.get('fields')
+    if raw:
+        names = [f.strip() for f in raw.split(',') if f.strip()]
+        fields = tuple(sorted({f for f in names if f in BRAND_FIELDS}))
+        image_fields = tuple(sorted({f[len('images.'):] for f in names if f.startswith('images.')})) or None
+
+    if fields is None and image_fields is None and mode == 'all':
+        return None
+    return Projection(fields, image_fields, mode)
+
+
+def select_cover(images) -> Optional[Dict]:
+    """按图片类型优先级选择封面，没有匹配类型时使用第一张"""
+    for image_type in COVER_PRIORITY:
+        for image in images:
+            if image.get('image_type') == image_type:
+                return image
+    return images[0] if images else None
+
+
+# 规范化列表格式中按字符串表引用的图片字段（取值重复度高）
+INTERNED_IMAGE_FIELDS = ('brand_name', 'image_type', 'color', 'dominant_color')
+
+
+def normalize_listing(result: Dict) -> Dict:
+    """把品牌列表转换为规范化格式（v=2）：每张图片只序列化一次
+
+    - image_fields + images：图片表，每行是一张图片的字段值，行号即图片ID
+    - strings：INTERNED_IMAGE_FIELDS字段的取值存为字符串表下标
+    - brands[].images：图片ID列表
+    """
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+    image_fields: List[str] = []
+    field_index: Dict[str, int] = {}
+    rows: List[List] = []
+    image_ids: Dict = {}
+
+    def intern(value):
+        if value is None:
+            return None
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = string_ids[value] = len(strings)
+            strings.append(value)
+        return string_id
+
+    def image_id(image: Dict) -> int:
+        # 投影后可能没有relative_path，此时按字段值去重（取值都是标量）
+        key = image.get('relative_path') or tuple(image.items())
+        existing = image_ids.get(key)
+        if existing is not None:
+            return existing
+        row = [None] * len(image_fields)
+        for field, value in image.items():
+            index = field_index.get(field)
+            if index is None:
+                index = field_index[field] = len(image_fields)
+                image_fields.append(field)
+                row.append(None)
+            row[index] = intern(value) if field in INTERNED_IMAGE_FIELDS else value
+        image_ids[key] = len(rows)
+        rows.append(row)
+        return image_ids[key]
+
+    for image in result.get('images') or ():
+        image_id(image)
+    brands = []
+    for brand in result['brands']:
+        record = dict(brand)
+        if 'images' in record:
+            record['images'] = [image_id(image) for image in brand['images']]
+        brands.append(record)
+
+    # 先出现的行可能比后来新增的字段短，补齐
+    for row in rows:
+        row.extend([None] * (len(image_fields) - len(row)))
+
+    normalized = {key: value for key, value in result.items() if key not in ('images', 'brands')}
+    normalized.update({
+        'version': 2,
+        'strings': strings,
+        'interned_fields': [f for f in INTERNED_IMAGE_FIELDS if f in field_index],
+        'image_fields': image_fields,
+        'images': rows,
+        'brands': brands
+    })
+    return normalized
+
+
+class BrandSnapshot:
+    """品牌快照 - 构建后只读，所有字段都不应被修改"""
+
+    # 每个快照最多缓存的编码响应数（page参数不受限，需要上限）
+    MAX_ENCODED = 256
+    # 每个快照最多缓存的字段投影种类
+    MAX_PROJECTIONS = 16
+
+    def __init__(self, tag: str, images: List[Dict], brands: List[Dict],
+                 products: Dict[str, Dict], like_counts: Dict[str, int], image_index):
+        self.tag = tag
+        self.images = tuple(images)
+        self.brands = tuple(brands)                       # 按发布时间倒序的合并品牌记录
+        self.brands_by_name = MappingProxyType({b['name']: b for b in brands})
+        self.sort_keys = tuple(brand_sort_key(b) for b in brands)
+        self.facets = FacetIndex(brands)
+        self.products = MappingProxyType(products)        # 产品品牌名 -> 产品字段
+        self.like_counts = MappingProxyType(like_counts)  # 基础品牌名 -> 点赞数
+        self.image_index = image_index
+        self.built_at = time.time()
+        self._encoded: 'OrderedDict[Hashable, EncodedResponse]' = OrderedDict()
+        self._encoded_lock = threading.Lock()
+        self._projections: 'OrderedDict[Projection, Dict[str, Dict]]' = OrderedDict()
+
+    def etag_for(self, key: Hashable) -> str:
+        """响应的ETag只由快照版本和规范化后的请求参数决定，不需要先序列化"""
+        return hashlib.md5(f"{self.tag}:{key!r}".encode()).hexdigest()
+
+    def encoded(self, key: Hashable, encode: Callable[[], bytes]) -> EncodedResponse:
+        """获取key对应的编码响应，未缓存时调用encode生成（同一快照内每个key只编码一次）"""
+        with self._encoded_lock:
+            cached = self._encoded.get(key)
+            if cached is not None:
+                self._encoded.move_to_end(key)
+                return cached
+
+        # 编码在锁外进行，并发的首次请求最多重复编码一次
+        from backend.utils.compression import CompressedBody
+        result = EncodedResponse(CompressedBody(encode()), self.etag_for(key))
+        with self._encoded_lock:
+            self._encoded[key] = result
+            while len(self._encoded) > self.MAX_ENCODED:
+                self._encoded.popitem(last=False)
+        return result
+
+    def get_page(self, page: int, per_page: int, load_all: bool = False,
+                 selection: Selection = (), with_facets: bool = False,
+                 projection: Optional[Projection] = None) -> Dict:
+        """分页获取品牌列表（与原/api/images响应结构一致）
+
+        selection: 分面筛选条件；with_facets或有筛选条件时附带当前条件下的分面计数
+        projection: 字段投影，见parse_projection
+        """
+        if selection:
+            mask = self.facets.select(selection)
+            brands = tuple(self.brands[i] for i in self.facets.members(mask))
+            images = tuple(img for brand in brands for img in brand['images']) if load_all else ()
+        else:
+            brands, images = self.brands, self.images
+
+        total_brands = len(brands)
+        if load_all:
+            result = {
+                'success': True,
+                'images': images,
+                'brands': brands,
+                'pagination': {
+                    'current_page': 1,
+                    'per_page': per_page,
+                    'total_brands': total_brands,
+                    'total_pages': 1,
+                    'has_next': False,
+                    'has_prev': False
+                },
+                'total': len(images)
+            }
+        else:
+            start_idx = (page - 1) * per_page
+            total_pages = (total_brands + per_page - 1) // per_page
+            page_brands = brands[max(start_idx, 0):max(start_idx + per_page, 0)]
+            result = {
+                'success': True,
+                'images': [],  # 分页时不返回所有图片数据
+                'brands': page_brands,
+                'pagination': {
+                    'current_page': page,
+                    'per_page': per_page,
+                    'total_brands': total_brands,
+                    'total_pages': total_pages,
+                    'has_next': page < total_pages,
+                    'has_prev': page > 1,
+                    # 之后可以改用游标继续翻页
+                    'next_cursor': self.cursor_for(page_brands[-1]) if page < total_pages and page_brands else None
+                },
+                'total': len(self.images)
+            }
+
+        if selection or with_facets:
+            result['facets'] = self.facets.counts(selection)
+        return self._apply_projection(result, projection)
+
+    def get_page_after(self, cursor: Optional[Tuple], per_page: int,
+                       selection: Selection = (), with_facets: bool = False,
+                       projection: Optional[Projection] = None) -> Dict:
+        """游标分页：返回排在cursor（上一页最后一个品牌的排序键）之后、满足筛选条件的per_page个品牌"""
+        start = self._position_after(tuple(cursor)) if cursor else 0
+        if selection:
+            mask = self.facets.select(selection)
+            positions = list(islice(self.facets.members(mask, start), per_page + 1))
+            brands = [self.brands[i] for i in positions[:per_page]]
+            has_next = len(positions) > per_page
+            total_brands = self.facets.count(mask)
+        else:
+            brands = self.brands[start:start + per_page]
+            has_next = start + per_page < len(self.brands)
+            total_brands = len(self.brands)
+
+        result = {
+            'success': True,
+            'images': [],
+            'brands': brands,
+            'pagination': {
+                'per_page': per_page,
+                'total_brands': total_brands,
+                'has_next': has_next,
+                'next_cursor': self.cursor_for(brands[-1]) if has_next and brands else None
+            },
+            'total': len(self.images)
+        }
+        if selection or with_facets:
+            result['facets'] = self.facets.counts(selection)
+        return self._apply_projection(result, projection)
+
+    def _apply_projection(self, result: Dict, projection: Optional[Projection]) -> Dict:
+        if projection is None:
+            return result
+        with self._encoded_lock:
+            memo = self._projections.get(projection)
+            if memo is None:
+                memo = self._projections[projection] = {}
+                while len(self._projections) > self.MAX_PROJECTIONS:
+                    self._projections.popitem(last=False)
+            else:
+                self._projections.move_to_end(projection)
+
+        brands = []
+        for brand in result['brands']:
+            projected = memo.get(brand['name'])
+            if projected is None:
+                projected = memo[brand['name']] = self._project_brand(brand, projection)
+            brands.append(projected)
+        result['brands'] = brands
+
+        if projection.images != 'all':
+            result['images'] = []  # 顶层的全部图片列表只在images=all时返回
+        elif projection.image_fields and result['images']:
+            result['images'] = [self._project_image(img, projection.image_fields) for img in result['images']]
+        return result
+
+    @staticmethod
+    def _project_image(image: Dict, image_fields: Tuple[str, ...]) -> Dict:
+        return {key: value for key, value in image.items() if key in image_fields}
+
+    def _project_brand(self, brand: Dict, projection: Projection) -> Dict:
+        fields = projection.fields
+        record = {
+            key: value for key, value in brand.items()
+            if key != 'images' and (fields is None or key in fields or key in ('name', 'imageCount'))
+        }
+        if projection.images == 'none' or (fields is not None and 'images' not in fields
+                                           and projection.image_fields is None and projection.images == 'all'):
+            return record
+
+        images = brand['images']
+        if projection.images == 'cover':
+            cover = select_cover(images)
+            images = [cover] if cover else []
+        if projection.image_fields:
+            images = [self._project_image(img, projection.image_fields) for img in images]
+        record['images'] = images
+        return record
+
+    @staticmethod
+    def cursor_for(brand: Dict) -> str:
+        from backend.utils.cursor import encode_cursor
+        return encode_cursor(*brand_sort_key(brand))
+
+    def _position_after(self, key: Tuple) -> int:
+        """二分查找第一个排在key之后的品牌位置（key对应的品牌可能已不在当前快照中）"""
+        low, high = 0, len(self.sort_keys)
+        while low < high:
+            mid = (low + high) // 2
+            if _precedes(key, self.sort_keys[mid]):
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def get_brand_detail(self, brand_name: str) -> Optional[Dict]:
+        """获取品牌详情（与原/api/brand响应结构一致），找不到时返回None"""
+        base_name = base_brand_name(brand_name)
+
+        brand_info = self._brand_info(brand_name)
+        if not brand_info and base_name != brand_name:
+            brand_info = self._brand_info(base_name)
+        if not brand_info:
+            return None
+
+        brand_images = brand_info['images']
+        return {
+            'success': True,
+            'brand_info': {
+                'name': brand_name,
+                'base_name': base_name,
+                **brand_info,
+                'like_count': self.like_counts.get(base_name, 0)
+            },
+            'images': brand_images,
+            'imageCount': len(brand_images)
+        }
+
+    def _brand_info(self, requested_name: str) -> Optional[Dict]:
+        """按 精确匹配 -> 基础品牌名 -> 模糊匹配 查找产品，并附上图片"""
+        product = self.products.get(requested_name)
+        if product is None:
+            product = self.products.get(requested_name.split('(')[0].strip())
+        if product is None:
+            from backend.services.brand_matcher import get_brand_matcher
+            candidates = get_brand_matcher().match(requested_name, source='products', limit=1, containment_only=True)
+            if candidates:
+                product = self.products.get(candidates[0][0])
+        if product is None:
+            return None
+
+        brand_images = self.image_index.lookup(requested_name)
+        if not brand_images and requested_name != product['brand_name']:
+            brand_images = self.image_index.lookup(product['brand_name'])
+
+        return {
+            **product,
+            'name': requested_name,            # 使用用户请求的完整品牌名
+            'brand_name': requested_name,
+            'db_brand_name': product['brand_name'],
+            'images': brand_images,
+            'imageCount': len(brand_images)
+        }
+
+
+class BrandCatalog:
+    """品牌快照管理 - 首次访问时同步构建，之后数据版本变化时在后台重建并原子替换"""
+
+    # 产品或点赞可能被其他进程修改，超过该时间也重建一次（多进程部署时可调小）
+    MAX_AGE = int(os.environ.get('BRAND_CATALOG_MAX_AGE', 600))
+    # 合并短时间内的连续变化（例如连续点赞）
+    REBUILD_DELAY = 0.2
+    # 产品或点赞数加载失败（沿用了上一个快照的数据）时，间隔多久重试
+    RETRY_INTERVAL = 5
+
+    def __init__(self):
+        self._snapshot: Optional[BrandSnapshot] = None
+        self._app = None
+        self._build_seq = 0
+        # 当前快照构建时的图片/产品数据版本；只有点赞版本变化时只刷新点赞数
+        self._data_tag = None
+        self._dirty = False
+        self._full_rebuild = False
+        self._retry_at: Optional[float] = None
+        self._building = False
+        self._listening = False
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def get(self) -> BrandSnapshot:
+        """获取当前快照（可能是正在后台重建前的上一个版本）"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            from flask import current_app
+            self._app = current_app._get_current_object()
+            with self._build_lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build()
+            # 首次构建之后再监听版本变化（首次加载图片索引时的版本递增不需要再重建）
+            self._listen()
+            return self._snapshot
+
+        from backend.services.cache_service import cache_service
+        if time.time() - snapshot.built_at >= self.MAX_AGE \
+                or cache_service.version_tag('images', 'products') != self._data_tag \
+                or (self._retry_at is not None and time.time() >= self._retry_at):
+            self.schedule_rebuild()
+        elif not snapshot.tag.startswith(cache_service.version_tag(*NAMESPACES) + '.'):
+            self.schedule_rebuild(likes_only=True)
+        return snapshot
+
+    def get_tag(self) -> str:
+        """当前快照的版本标识，用于ETag"""
+        return self.get().tag
+
+    def schedule_rebuild(self, likes_only: bool = False):
+        """请求后台重建，重建期间的多次请求合并为一次
+
+        likes_only: 只有点赞数变化，复用当前快照的图片和产品数据，只重新读取点赞数
+        """
+        with self._lock:
+            self._dirty = True
+            if not likes_only:
+                self._full_rebuild = True
+            if self._building or self._app is None:
+                return
+            self._building = True
+        threading.Thread(target=self._rebuild_loop, name='brand-catalog', daemon=True).start()
+
+    def _listen(self):
+        if self._listening:
+            return
+        from backend.services.cache_service import cache_service
+
+        def on_version_bump(namespace, version):
+            if namespace in NAMESPACES:
+                self.schedule_rebuild(likes_only=namespace == 'likes')
+
+        cache_service.add_version_listener(on_version_bump)
+        self._listening = True
+
+    def _rebuild_loop(self):
+        while True:
+            time.sleep(self.REBUILD_DELAY)
+            with self._lock:
+                if not self._dirty:
+                    self._building = False
+                    return
+                self._dirty = False
+                full_rebuild, self._full_rebuild = self._full_rebuild, False
+
+            try:
+                with self._app.app_context():
+                    if full_rebuild or self._snapshot is None:
+                        snapshot = self._build()
+                    else:
+                        snapshot = self._refresh_likes(self._snapshot)
+                with self._build_lock:
+                    self._snapshot = snapshot
+            except Exception as e:
+                print(f"品牌快照重建失败: {e}")
+
+    def _build(self) -> BrandSnapshot:
+        from backend.services.cache_service import cache_service
+        from backend.services.image_service import ImageService
+
+        start = time.time()
+        image_service = ImageService()
+        # 先加载图片（首次加载会递增images版本），再记录版本；构建期间的新变化会触发下一次重建
+        images = image_service.get_all_images()
+        image_index = image_service.get_brand_index()
+        version_tag = cache_service.version_tag(*NAMESPACES)
+        data_tag = cache_service.version_tag('images', 'products')
+
+        previous = self._snapshot
+        self._retry_at = None
+        products = self._load_or_keep(self._load_products, previous and previous.products, '产品数据')
+        like_counts = self._load_or_keep(self._load_like_counts, previous and previous.like_counts, '点赞数')
+        brands = self._merge_brands(images, products, like_counts)
+
+        self._build_seq += 1
+        snapshot = BrandSnapshot(f"{version_tag}.{self._build_seq}", images, brands,
+                                 products, like_counts, image_index)
+        self._data_tag = data_tag
+        print(f"🗃️ 品牌快照已构建: {len(brands)}个品牌, {len(images)}张图片, "
+              f"耗时{(time.time() - start) * 1000:.1f}ms")
+        return snapshot
+
+    def _refresh_likes(self, current: BrandSnapshot) -> BrandSnapshot:
+        """只更新点赞数：复用当前快照的图片、产品和图片索引，不重新查询产品表"""
+        from backend.services.cache_service import cache_service
+
+        version_tag = cache_service.version_tag(*NAMESPACES)
+        like_counts = self._load_or_keep(self._load_like_counts, current.like_counts, '点赞数')
+        brands = self._merge_brands(list(current.images), current.products, like_counts)
+
+        self._build_seq += 1
+        return BrandSnapshot(f"{version_tag}.{self._build_seq}", current.images, brands,
+                             dict(current.products), like_counts, current.image_index)
+
+    def _load_or_keep(self, load: Callable[[], Dict], previous: Optional[Mapping], label: str) -> Dict:
+        """加载失败时沿用上一个快照的数据（首次构建时为空），并安排稍后重试，
+        避免一次数据库错误就用空数据替换正常的快照"""
+        try:
+            return load()
+        except Exception as e:
+            print(f"加载{label}失败，{'沿用上一个快照' if previous is not None else '暂时为空'}: {e}")
+            self._retry_at = time.time() + self.RETRY_INTERVAL
+            return dict(previous) if previous is not None else {}
+
+    @staticmethod
+    def _load_products() -> Dict[str, Dict]:
+        from backend.models.product import Product
+        return {product.brand_name: product.to_dict() for product in Product.query.all()}
+
+    @staticmethod
+    def _load_like_counts() -> Dict[str, int]:
+        from backend.models.brand_like import BrandLike
+        return BrandLike.get_all_like_counts()
+
+    @staticmethod
+    def _merge_brands(images: List[Dict], products: Dict[str, Dict], like_counts: Dict[str, int]) -> List[Dict]:
+        """按基础品牌名合并同名不同颜色的品牌，补齐产品信息和点赞数，按发布时间倒序"""
+        base_brands: Dict[str, List[Dict]] = {}
+        for img in images:
+            base_brands.setdefault(base_brand_name(img['brand_name']), []).append(img)
+
+        brands = []
+        for base_name, brand_images in base_brands.items():
+            colors = set()
+            for img in brand_images:
+                if '(' in img['brand_name'] and ')' in img['brand_name']:
+                    colors.add(img['brand_name'].split('(')[1].split(')')[0])
+            display_name = f"{base_name}({'/'.join(sorted(colors))})" if colors else base_name
+
+            # 优先使用完整品牌名的产品信息，其次使用基础品牌名
+            product = next((products[img['brand_name']] for img in brand_images
+                            if img['brand_name'] in products), None)
+            if product is None:
+                product = products.get(base_name)
+
+            default_inspiration = f'{display_name}的设计灵感来源于传统文化与现代美学的融合。'
+            if product:
+                year = product['year']
+                if not year and product['publish_month']:
+                    try:
+                        year = int(product['publish_month'][:4])
+                    except ValueError:
+                        year = DEFAULT_YEAR
+                elif not year:
+                    year = DEFAULT_YEAR
+                record = {
+                    'name': display_name,
+                    'images': brand_images,
+                    'year': year,
+                    'material': product['material'] or DEFAULT_MATERIAL,
+                    'theme_series': product['theme_series'] or DEFAULT_THEME_SERIES,
+                    'print_size': product['print_size'] or DEFAULT_PRINT_SIZE,
+                    'inspiration_origin': product['inspiration_origin'] or default_inspiration,
+                    'publish_month': product['publish_month'] or DEFAULT_PUBLISH_MONTH
+                }
+            else:
+                record = {
+                    'name': display_name,
+                    'images': brand_images,
+                    'year': DEFAULT_YEAR,
+                    'material': DEFAULT_MATERIAL,
+                    'theme_series': DEFAULT_THEME_SERIES,
+                    'print_size': DEFAULT_PRINT_SIZE,
+                    'inspiration_origin': default_inspiration,
+                    'publish_month': DEFAULT_PUBLISH_MONTH
+                }
+
+            record['imageCount'] = len(brand_images)
+            record['like_count'] = like_counts.get(base_name, 0)
+            brands.append(record)
+
+        # 先按品牌名排序，再按(年份, 发布月份)倒序稳定排序，保证游标分页的顺序唯一
+        brands.sort(key=lambda x: x['name'])
+        brands.sort(key=lambda x: (int(x['year']), x['publish_month']), reverse=True)
+        return brands
+
+
+# 全局品牌目录
+brand_catalog = BrandCatalog()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+品牌名模糊匹配服务
+基于字符n-gram倒排索引，对中文品牌名给出带评分的候选列表，
+产品服务和图片服务共用同一个内存索引，模糊查询不再访问MySQL或遍历全部图片
+"""
+
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# 匹配前去除的字符
+_STRIP_CHARS = re.compile(r'[\s\-_]+')
+
+
+class BrandMatcher:
+    """品牌名n-gram匹配器 - 构建后只读，可在多线程间共享"""
+
+    def __init__(self, names_by_source: Dict[str, Iterable[str]], n: int = 2):
+        self.n = n
+        self._keys: List[str] = []                       # 归一化后的品牌名
+        self._grams: List[Set[str]] = []
+        self._names: List[Dict[str, Set[str]]] = []      # 原始品牌名 -> 来源集合
+        self._index: Dict[str, List[int]] = {}           # gram -> 归一化品牌名ID
+
+        key_ids: Dict[str, int] = {}
+        for source, names in names_by_source.items():
+            for name in names:
+                if not name:
+                    continue
+                key = self.normalize(name)
+                if not key:
+                    continue
+                key_id = key_ids.get(key)
+                if key_id is None:
+                    key_id = key_ids[key] = len(self._keys)
+                    self._keys.append(key)
+                    self._grams.append(self.grams(key))
+                    self._names.append({})
+                self._names[key_id].setdefault(name, set()).add(source)
+
+        for key_id, grams in enumerate(self._grams):
+            for gram in grams:
+                self._index.setdefault(gram, []).append(key_id)
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """去掉括号内的颜色和空格/连字符，统一小写"""
+        base = name.split('(')[0] if '(' in name else name
+        return _STRIP_CHARS.sub('', base).lower()
+
+    def grams(self, text: str) -> Set[str]:
+        """单字 + n-gram（中文品牌名通常只有2~4个字，单字保证短名也能召回）"""
+        result = set(text)
+        for i in range(len(text) - self.n + 1):
+            result.add(text[i:i + self.n])
+        return result
+
+    def score(self, query_key: str, query_grams: Set[str], key_id: int) -> float:
+        """评分：完全相同=1，包含关系0.6~1，其余按Dice系数"""
+        key = self._keys[key_id]
+        if key == query_key:
+            return 1.0
+        if query_key in key or key in query_key:
+            shorter, longer = sorted((len(query_key), len(key)))
+            return 0.6 + 0.4 * shorter / longer
+        grams = self._grams[key_id]
+        return 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+
+    def is_containment(self, query_key: str, key_id: int) -> bool:
+        """归一化后完全相同或互相包含"""
+        key = self._keys[key_id]
+        return query_key in key or key in query_key
+
+    def match(self, query: str, source: Optional[str] = None, limit: int = 10,
+              min_score: float = 0.0, containment_only: bool = False) -> List[Tuple[str, float]]:
+        """返回[(原始品牌名, 评分)]，按评分从高到低
+
+        containment_only: 只返回完全相同或互相包含的品牌（按品牌名查找详情时使用，
+        Dice相似但不包含的品牌是另一个品牌，例如“江南秋”与“江南春”）
+        """
+        query_key = self.normalize(query or '')
+        if not query_key:
+            return []
+
+        query_grams = self.grams(query_key)
+        candidates = set()
+        for gram in query_grams:
+            candidates.update(self._index.get(gram, ()))
+
+        scored = []
+        for key_id in candidates:
+            if containment_only and not self.is_containment(query_key, key_id):
+                continue
+            score = self.score(query_key, query_grams, key_id)
+            if score < min_score:
+                continue
+            for name, sources in self._names[key_id].items():
+                if source is None or source in sources:
+                    scored.append((name, score))
+
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class BrandMatcherRegistry:
+    """共享匹配器 - 产品或图片数据版本变化时重建"""
+
+    # 产品可能被其他进程修改，超过该时间也重建一次
+    MAX_AGE = 600
+
+    def __init__(self):
+        self._matcher: Optional[BrandMatcher] = None
+        self._version_tag = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> BrandMatcher:
+        from backend.services.cache_service import cache_service
+
+        version_tag = cache_service.version_tag('images', 'products')
+        matcher = self._matcher
+        if matcher is not None and self._version_tag == version_tag and time.time() - self._built_at < self.MAX_AGE:
+            return matcher
+
+        with self._lock:
+            if self._matcher is None or self._version_tag != cache_service.version_tag('images', 'products') \
+                    or time.time() - self._built_at >= self.MAX_AGE:
+                # 先加载数据（首次加载图片索引会递增版本号），再记录版本
+                names_by_source = {
+                    'products': self._load_product_names(),
+                    'images': self._load_image_brand_names()
+                }
+                self._version_tag = cache_service.version_tag('images', 'products')
+                self._matcher = BrandMatcher(names_by_source)
+                self._built_at = time.time()
+                print(f"🔤 品牌匹配索引已重建: {len(self._matcher)}个品牌")
+            return self._matcher
+
+    def invalidate(self):
+        """强制下次访问时重建"""
+        self._version_tag = None
+
+    @staticmethod
+    def _load_product_names() -> List[str]:
+        try:
+            from backend.models.product import Product
+            return [row[0] for row in Product.query.with_entities(Product.brand_name).all()]
+        except Exception as e:
+            print(f"加载产品品牌名失败: {e}")
+            return []
+
+    @staticmethod
+    def _load_image_brand_names() -> List[str]:
+        from backend.services.image_service import ImageService
+        index = ImageService().get_brand_index()
+        return list(index.exact.keys())
+
+
+# 全局匹配器注册表
+brand_matcher_registry = BrandMatcherRegistry()
+
+
+def get_brand_matcher() -> BrandMatcher:
+    """获取当前的共享品牌匹配器"""
+    return brand_matcher_registry.get()
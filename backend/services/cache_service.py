@@ -97,6 +97,12 @@ class CacheService:
             'deletes': 0
         }
         
+        # 数据版本号（images/products/likes等），数据变化时递增，用于ETag和缓存键
+        self._versions = {}
+        self._versions_lock = threading.Lock()
+        self._version_listeners = []
+        self.boot_id = hashlib.md5(f"{time.time()}".encode()).hexdigest()[:8]
+        
         # 启动后台清理线程
         self._start_cleanup_thread()
     
@@ -184,6 +190,31 @@ class CacheService:
         except Exception as e:
             print(f"清理缓存模式失败: {e}")
     
+    def get_version(self, namespace: str) -> int:
+        """获取数据版本号"""
+        return self._versions.get(namespace, 0)
+    
+    def bump_version(self, namespace: str) -> int:
+        """递增数据版本号，并通知版本监听器"""
+        with self._versions_lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            version = self._versions[namespace]
+        
+        for listener in list(self._version_listeners):
+            try:
+                listener(namespace, version)
+            except Exception as e:
+                print(f"数据版本监听器异常: {e}")
+        return version
+    
+    def add_version_listener(self, listener):
+        """登记数据版本监听器，bump_version后以(namespace, version)调用"""
+        self._version_listeners.append(listener)
+    
+    def version_tag(self, *namespaces: str) -> str:
+        """组合多个数据版本号，进程重启后自动变化"""
+        return '-'.join([self.boot_id] + [str(self.get_version(ns)) for ns in namespaces])
+    
     def stats(self) -> Dict:
         """获取缓存统计信息"""
         memory_stats = self.memory_cache.stats()
@@ -201,13 +232,15 @@ class CacheService:
 # 全局缓存实例
 cache_service = CacheService()
 
-def cached(ttl: int = 300, key_prefix: str = None):
-    """缓存装饰器"""
+def cached(ttl: int = 300, key_prefix: str = None, versions: tuple = ()):
+    """缓存装饰器，versions中的数据版本变化后缓存自动失效"""
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
             # 生成缓存键
             prefix = key_prefix or f"{func.__module__}.{func.__name__}"
+            if versions:
+                prefix = f"{prefix}@{cache_service.version_tag(*versions)}"
             cache_key = cache_service.generate_key(prefix, args=args, kwargs=kwargs)
             
             # 尝试从缓存获取
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+品牌分面索引
+每个分面取值对应一个位图（Python整数，第i位表示快照中第i个品牌），筛选组合通过位运算求交，
+分面计数按“同一分面内多选取并集、不同分面之间取交集”的规则实时计算：
+统计某个分面的取值数量时不应用该分面自身的选择，这样已选分面的其他取值仍显示可选数量
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 查询参数/品牌字段名 -> 计数结果中的键名（与/api/filters的brand_counts一致）
+FACETS = {
+    'year': 'years',
+    'material': 'materials',
+    'theme_series': 'theme_series',
+    'print_size': 'print_sizes',
+}
+
+# 规范化的筛选条件：((分面, (取值, ...)), ...)，可以直接作为缓存键
+Selection = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def facet_values(facet: str, brand: Dict) -> List[str]:
+    """品牌在某个分面上的取值（材质按/拆分为多个取值）"""
+    value = brand.get(facet)
+    if value is None or value == '':
+        return []
+    if facet == 'material':
+        return [m.strip() for m in str(value).split('/') if m.strip()]
+    return [str(value)]
+
+
+def parse_selection(args) -> Selection:
+    """从请求参数解析筛选条件，支持重复参数和逗号分隔：?material=真丝&material=棉麻 或 ?material=真丝,棉麻"""
+    selection = []
+    for facet in FACETS:
+        values = set()
+        for raw in args.getlist(facet):
+            values.update(v.strip() for v in raw.split(',') if v.strip() and v.strip() != '全部')
+        if values:
+            selection.append((facet, tuple(sorted(values))))
+    return tuple(selection)
+
+
+class FacetIndex:
+    """分面位图索引 - 随品牌快照构建，只读"""
+
+    def __init__(self, brands: Iterable[Dict]):
+        self.size = 0
+        self.bitmaps: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        for position, brand in enumerate(brands):
+            bit = 1 << position
+            for facet, bitmaps in self.bitmaps.items():
+                for value in facet_values(facet, brand):
+                    bitmaps[value] = bitmaps.get(value, 0) | bit
+            self.size = position + 1
+        self.all = (1 << self.size) - 1
+
+    def _facet_mask(self, facet: str, values: Tuple[str, ...]) -> int:
+        """同一分面内多选取并集"""
+        bitmaps = self.bitmaps[facet]
+        mask = 0
+        for value in values:
+            mask |= bitmaps.get(value, 0)
+        return mask
+
+    def select(self, selection: Selection, exclude: Optional[str] = None) -> int:
+        """满足筛选条件的品牌位图（exclude为计算时忽略的分面）"""
+        mask = self.all
+        for facet, values in selection:
+            if facet != exclude:
+                mask &= self._facet_mask(facet, values)
+        return mask
+
+    def counts(self, selection: Selection) -> Dict[str, Dict[str, int]]:
+        """当前筛选条件下每个分面取值的品牌数量（按数量倒序）"""
+        selected_facets = {facet for facet, _ in selection}
+        base = self.select(selection)
+        result = {}
+        for facet, key in FACETS.items():
+            scope = self.select(selection, exclude=facet) if facet in selected_facets else base
+            counts = {}
+            for value, bitmap in self.bitmaps[facet].items():
+                count = _popcount(bitmap & scope)
+                if count:
+                    counts[value] = count
+            result[key] = dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+        return result
+
+    @staticmethod
+    def members(mask: int, start: int = 0) -> Iterator[int]:
+        """按位置升序遍历位图中从start开始的品牌位置"""
+        mask >>= start
+        position = start
+        while mask:
+            low = mask & -mask
+            shift = low.bit_length() - 1
+            position += shift
+            yield position
+            mask >>= shift + 1
+            position += 1
+
+    @staticmethod
+    def count(mask: int) -> int:
+        return _popcount(mask)
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地图片目录索引
+使用SQLite持久化图片清单（相对路径 + mtime/size），启动时直接加载，
+后续只重新解析mtime发生变化的目录，避免每次缓存过期都全量扫描
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Callable, Dict, Iterable, List, Optional
+
+# 索引结构版本，结构变化时自动重建
+SCHEMA_VERSION = '3'
+
+# 默认索引文件位置：项目根目录/data/image_catalog.sqlite3
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_INDEX_PATH = os.path.join(_PROJECT_ROOT, 'data', 'image_catalog.sqlite3')
+
+
+class ImageCatalog:
+    """图片目录索引 - 内存清单 + SQLite持久化，按目录增量更新"""
+
+    def __init__(self, images_dir: str, index_path: str,
+                 parse_filename: Callable[[str], Dict],
+                 is_allowed_file: Callable[[str], bool],
+                 excluded_names: set = None,
+                 check_interval: float = 30):
+        self.images_dir = images_dir
+        self.index_path = index_path
+        self.parse_filename = parse_filename
+        self.is_allowed_file = is_allowed_file
+        self.excluded_names = excluded_names or set()
+        self.check_interval = check_interval
+
+        self.version = 0
+        self._changed_brands = set()             # 本次变更涉及的品牌，提交时统一失效缓存
+        self._entries: Dict[str, Dict] = {}      # relative_path -> 图片记录
+        self._stats: Dict[str, tuple] = {}       # relative_path -> (mtime_ns, size)
+        self._derivatives: Dict[str, Dict] = {}  # relative_path -> 衍生图哈希及尺寸/主色/LQIP（已处理）
+        self._failed: Dict[str, tuple] = {}      # relative_path -> 生成失败时的(mtime_ns, size)，文件变化前不再重试
+        self._dir_mtimes: Dict[str, int] = {}    # 相对目录 -> mtime_ns（''表示根目录）
+        self._images: List[Dict] = []
+        self._derived: Dict[str, tuple] = {}     # 名称 -> (版本, 派生数据)
+        self._listeners: List[Callable[[List[Dict], List[str]], None]] = []
+        self._loaded = False
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # 对外接口
+    # ------------------------------------------------------------------
+    def get_images(self) -> List[Dict]:
+        """获取图片清单，必要时做一次轻量的目录mtime检查"""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+                self.refresh()
+            elif self.check_interval is not None and time.time() - self._last_check >= self.check_interval:
+                # 有文件监听时check_interval为None，不再做惰性检查
+                self.refresh()
+            return self._images
+
+    def derived(self, name: str, builder: Callable[[List[Dict]], object]):
+        """按索引版本缓存派生数据（如品牌倒排索引），版本变化后才重新构建"""
+        with self._lock:
+            images = self.get_images()
+            cached = self._derived.get(name)
+            if cached and cached[0] == self.version:
+                return cached[1]
+
+            value = builder(images)
+            self._derived[name] = (self.version, value)
+            return value
+
+    def get_file_stats(self, relative_path: str) -> Optional[tuple]:
+        """已登记图片的(mtime_ns, size)，未登记时返回None；不访问磁盘，轮询模式下原地覆盖的文件可能过期"""
+        with self._lock:
+            self.get_images()
+            return self._stats.get(relative_path)
+
+    def add_listener(self, listener: Callable[[List[Dict], List[str]], None]):
+        """登记变更监听器，每次增量提交后以(新增或变更的记录, 删除的相对路径)调用"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def pending_derivatives(self) -> List[tuple]:
+        """尚未生成衍生图的图片，返回[(relative_path, (mtime_ns, size))]；
+        生成失败且文件未再变化的图片不返回"""
+        with self._lock:
+            self.get_images()
+            return [
+                (path, self._stats[path])
+                for path in sorted(self._entries)
+                if path not in self._derivatives and self._failed.get(path) != self._stats[path]
+            ]
+
+    def set_derivatives(self, results: Dict[str, tuple], failures: Dict[str, tuple] = None,
+                        notify: bool = True) -> bool:
+        """登记已生成的衍生图及图片元数据，results为{relative_path: ((mtime_ns, size), info)}，
+        info包含digest/width/height/dominant_color/lqip；
+        生成期间文件又被修改的记录会被忽略，等待下一轮重新生成。
+        failures为{relative_path: (mtime_ns, size)}，记录生成失败的图片，文件mtime/size变化前不再重试；
+        notify为False时只持久化，受影响品牌留到下一次notify=True的调用时统一失效（一轮生成只递增一次images版本）"""
+        with self._lock:
+            for relative_path, stats in (failures or {}).items():
+                if self._stats.get(relative_path) == stats:
+                    self._failed[relative_path] = stats
+
+            updated = []
+            for relative_path, (stats, info) in results.items():
+                entry = self._entries.get(relative_path)
+                if entry is None or self._stats.get(relative_path) != stats:
+                    continue
+                self._derivatives[relative_path] = info
+                entry = self._make_entry(
+                    relative_path, entry['filename'], entry['brand_name'], entry['image_type'],
+                    entry['color'], entry['has_color'], entry['size'], info
+                )
+                self._entries[relative_path] = entry
+                self._changed_brands.add(entry['brand_name'])
+                updated.append(entry)
+
+            if updated:
+                self._persist(updated, [])
+                self._rebuild_list()
+            if notify and self._changed_brands:
+                self._notify()
+            return bool(updated)
+
+    def load(self):
+        """从SQLite索引加载图片清单"""
+        with self._lock:
+            # 重新加载（包括加载失败后重新扫描）时，之前生成失败的图片重新参与衍生图生成
+            self._failed.clear()
+            try:
+                with closing(self._connect()) as conn:
+                    for rel_dir, mtime_ns in conn.execute('SELECT rel_dir, mtime_ns FROM directories'):
+                        self._dir_mtimes[rel_dir] = mtime_ns
+                    for row in conn.execute(
+                        'SELECT relative_path, filename, brand_name, image_type, color, '
+                        'has_color, size, mtime_ns, digest, width, height, dominant_color, lqip FROM images'
+                    ):
+                        relative_path, size, mtime_ns = row[0], row[6], row[7]
+                        info = None
+                        if row[8]:
+                            info = dict(zip(('digest', 'width', 'height', 'dominant_color', 'lqip'), row[8:]))
+                            self._derivatives[relative_path] = info
+                        self._entries[relative_path] = self._make_entry(*row[:7], info)
+                        self._stats[relative_path] = (mtime_ns, size)
+                print(f"📇 图片索引加载完成: {len(self._entries)}张图片")
+            except sqlite3.Error as e:
+                print(f"⚠️ 图片索引加载失败，将重新扫描: {e}")
+                self._entries.clear()
+                self._stats.clear()
+                self._derivatives.clear()
+                self._dir_mtimes.clear()
+
+            self._loaded = True
+            self._rebuild_list()
+
+    def refresh(self) -> bool:
+        """检查目录mtime，只重新解析发生变化的目录，返回是否有变化"""
+        with self._lock:
+            self._last_check = time.time()
+
+            if not os.path.isdir(self.images_dir):
+                print(f"⚠️ 本地图片目录不存在: {self.images_dir}")
+                return False
+
+            changed_dirs = []
+            root_mtime = self._stat_mtime(self.images_dir)
+            if self._dir_mtimes.get('') != root_mtime:
+                changed_dirs.append('')
+
+            for rel_dir, mtime_ns in list(self._dir_mtimes.items()):
+                if not rel_dir:
+                    continue
+                current = self._stat_mtime(os.path.join(self.images_dir, rel_dir))
+                if current != mtime_ns:
+                    changed_dirs.append(rel_dir)
+
+            if not changed_dirs:
+                return False
+
+            return self.apply_dirs(changed_dirs)
+
+    def apply_dirs(self, rel_dirs: Iterable[str]) -> bool:
+        """重新扫描指定目录（目录新建、删除、改名时使用）"""
+        with self._lock:
+            upserts, deletes = [], []
+            for rel_dir in rel_dirs:
+                dir_upserts, dir_deletes = self._rescan_dir(rel_dir)
+                upserts.extend(dir_upserts)
+                deletes.extend(dir_deletes)
+            return self._commit(upserts, deletes)
+
+    def apply_paths(self, relative_paths: Iterable[str]) -> bool:
+        """按文件增量更新索引（文件新建、改名、删除时使用），不扫描目录"""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+            upserts, deletes, touched_dirs = [], [], set()
+            for relative_path in set(relative_paths):
+                rel_dir = _dir_of(relative_path)
+                if '/' in rel_dir:
+                    # 只索引一级子目录
+                    continue
+                if rel_dir not in self._dir_mtimes:
+                    # 未登记的新目录，整体扫描
+                    dir_upserts, dir_deletes = self._rescan_dir(rel_dir)
+                    upserts.extend(dir_upserts)
+                    deletes.extend(dir_deletes)
+                    continue
+
+                touched_dirs.add(rel_dir)
+                filename = os.path.basename(relative_path)
+                try:
+                    stat = os.stat(os.path.join(self.images_dir, relative_path))
+                    is_file = os.path.isfile(os.path.join(self.images_dir, relative_path))
+                except OSError:
+                    stat, is_file = None, False
+
+                if is_file and self._is_indexable(filename):
+                    if self._stats.get(relative_path) != (stat.st_mtime_ns, stat.st_size):
+                        upserts.append(self._upsert(rel_dir, filename, stat))
+                elif relative_path in self._entries:
+                    self._remove(relative_path)
+                    deletes.append(relative_path)
+
+            # 同步目录mtime，避免轮询时重复扫描
+            for rel_dir in touched_dirs:
+                dir_path = os.path.join(self.images_dir, rel_dir) if rel_dir else self.images_dir
+                self._dir_mtimes[rel_dir] = self._stat_mtime(dir_path)
+
+            return self._commit(upserts, deletes)
+
+    def _commit(self, upserts: List[Dict], deletes: List[str]) -> bool:
+        """持久化增量变化，重建清单并失效相关缓存"""
+        self._persist(upserts, deletes)
+        if not (upserts or deletes):
+            return False
+
+        self._rebuild_list()
+        self._notify()
+        print(f"📇 图片索引增量更新: 新增/变更{len(upserts)}张, 删除{len(deletes)}张")
+        for listener in self._listeners:
+            try:
+                listener(upserts, deletes)
+            except Exception as e:
+                print(f"图片索引监听器异常: {e}")
+        return True
+
+    def _notify(self):
+        """失效受影响品牌的详情缓存，并递增images数据版本"""
+        from backend.services.cache_service import cache_service
+
+        brands = set()
+        for brand_name in self._changed_brands:
+            if brand_name:
+                brands.add(brand_name)
+                brands.add(brand_name.split('(')[0].strip())
+        self._changed_brands.clear()
+
+        for brand_name in brands:
+            cache_service.delete(f"brand_detail_{brand_name}")
+        cache_service.delete("image_statistics")
+        cache_service.delete("image_filter_options")
+        cache_service.bump_version('images')
+
+    # ------------------------------------------------------------------
+    # 扫描
+    # ------------------------------------------------------------------
+    def _rescan_dir(self, rel_dir: str):
+        """重新扫描单个目录（不递归），返回(新增或变更的记录, 删除的相对路径)"""
+        dir_path = os.path.join(self.images_dir, rel_dir) if rel_dir else self.images_dir
+        upserts = []
+        seen = set()
+
+        mtime_ns = self._stat_mtime(dir_path)
+        if mtime_ns is None:
+            # 目录已被删除
+            self._dir_mtimes.pop(rel_dir, None)
+        else:
+            self._dir_mtimes[rel_dir] = mtime_ns
+            with os.scandir(dir_path) as it:
+                for item in it:
+                    if item.is_dir():
+                        # 根目录下的子文件夹：登记后在本轮扫描
+                        if not rel_dir and item.name not in self._dir_mtimes:
+                            self._dir_mtimes[item.name] = None
+                            sub_upserts, _ = self._rescan_dir(item.name)
+                            upserts.extend(sub_upserts)
+                            seen.update(e['relative_path'] for e in sub_upserts)
+                        continue
+
+                    filename = item.name
+                    if not self._is_indexable(filename):
+                        continue
+
+                    relative_path = f"{rel_dir}/{filename}" if rel_dir else filename
+                    seen.add(relative_path)
+                    stat = item.stat()
+                    if self._stats.get(relative_path) != (stat.st_mtime_ns, stat.st_size):
+                        upserts.append(self._upsert(rel_dir, filename, stat))
+
+        # 删除该目录下已不存在的图片
+        deletes = [
+            path for path in self._entries
+            if _dir_of(path) == rel_dir and path not in seen
+        ]
+        # 根目录变化时，顺带清理已删除子目录的记录
+        if not rel_dir:
+            for sub_dir in [d for d in self._dir_mtimes if d and not os.path.isdir(os.path.join(self.images_dir, d))]:
+                self._dir_mtimes.pop(sub_dir, None)
+                deletes.extend(p for p in self._entries if _dir_of(p) == sub_dir)
+        for path in deletes:
+            self._remove(path)
+
+        return upserts, deletes
+
+    def _is_indexable(self, filename: str) -> bool:
+        """是否需要登记到索引（跳过社交图标和格式协商用的兄弟文件）"""
+        from backend.services.image_variants import is_variant_file
+
+        return (self.is_allowed_file(filename)
+                and filename.lower() not in self.excluded_names
+                and not is_variant_file(filename))
+
+    def _upsert(self, rel_dir: str, filename: str, stat: os.stat_result) -> Dict:
+        """解析文件名，构建并登记图片记录"""
+        parsed_info = self.parse_filename(filename)
+        relative_path = f"{rel_dir}/{filename}" if rel_dir else filename
+        entry = self._make_entry(
+            relative_path, filename,
+            parsed_info['brand_name'] or rel_dir,
+            parsed_info['image_type'],
+            parsed_info['color'],
+            parsed_info['has_color'],
+            stat.st_size
+        )
+        previous = self._entries.get(relative_path)
+        if previous:
+            self._changed_brands.add(previous['brand_name'])
+        self._changed_brands.add(entry['brand_name'])
+
+        self._entries[relative_path] = entry
+        self._stats[relative_path] = (stat.st_mtime_ns, stat.st_size)
+        # 文件内容可能已变化，衍生图需要重新生成
+        self._derivatives.pop(relative_path, None)
+        self._failed.pop(relative_path, None)
+        return entry
+
+    def _remove(self, relative_path: str):
+        """移除图片记录"""
+        entry = self._entries.pop(relative_path, None)
+        self._stats.pop(relative_path, None)
+        self._derivatives.pop(relative_path, None)
+        self._failed.pop(relative_path, None)
+        if entry:
+            self._changed_brands.add(entry['brand_name'])
+
+    @staticmethod
+    def _make_entry(relative_path, filename, brand_name, image_type, color, has_color, size,
+                    info: Dict = None) -> Dict:
+        original = f"/static/images/{relative_path}"
+        info = info or {}
+        if info.get('digest'):
+            # 衍生图已生成：列表用缩略图，详情用中等尺寸，original保留原图
+            from backend.services.image_derivatives import derivative_url
+            url = derivative_url(info['digest'], 'medium')
+            thumbnail = derivative_url(info['digest'], 'thumbnail')
+        else:
+            url = thumbnail = original
+        return {
+            'filename': filename,
+            'relative_path': relative_path,
+            'brand_name': brand_name,
+            'image_type': image_type,
+            'color': color,
+            'has_color': bool(has_color),
+            'size': size,
+            # 本地图片URL
+            'url': url,
+            'thumbnail': thumbnail,
+            'original': original,
+            # 原图尺寸、主色和LQIP占位图，前端据此预留布局并显示预览（未处理时为None）
+            'width': info.get('width'),
+            'height': info.get('height'),
+            'dominant_color': info.get('dominant_color'),
+            'lqip': info.get('lqip')
+        }
+
+    def _rebuild_list(self):
+        """重建排序后的图片清单（新列表对象，读者持有的旧列表不受影响）"""
+        self._images = sorted(
+            self._entries.values(),
+            key=lambda x: (x['brand_name'] or '', x['relative_path'])
+        )
+        self.version += 1
+
+    @staticmethod
+    def _stat_mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        """打开索引数据库，必要时创建/重建表结构"""
+        index_dir = os.path.dirname(self.index_path)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+
+        conn = sqlite3.connect(self.index_path, timeout=10)
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        meta = dict(conn.execute('SELECT key, value FROM meta'))
+        expected = {'schema_version': SCHEMA_VERSION, 'images_dir': os.path.abspath(self.images_dir)}
+        if any(meta.get(key) != value for key, value in expected.items()):
+            # 结构版本或图片目录变化，旧索引作废
+            conn.execute('DROP TABLE IF EXISTS directories')
+            conn.execute('DROP TABLE IF EXISTS images')
+            conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', list(expected.items()))
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS directories (
+                rel_dir TEXT PRIMARY KEY,
+                mtime_ns INTEGER
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                relative_path TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                brand_name TEXT,
+                image_type TEXT,
+                color TEXT,
+                has_color INTEGER,
+                size INTEGER,
+                mtime_ns INTEGER,
+                digest TEXT,
+                width INTEGER,
+                height INTEGER,
+                dominant_color TEXT,
+                lqip TEXT
+            )
+        """)
+        return conn
+
+    def _persist(self, upserts: List[Dict], deletes: List[str]):
+        """把增量变化写回SQLite索引"""
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO images (relative_path, filename, brand_name, image_type, '
+                    'color, has_color, size, mtime_ns, digest, width, height, dominant_color, lqip) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [
+                        (e['relative_path'], e['filename'], e['brand_name'], e['image_type'],
+                         e['color'], int(e['has_color']), e['size'], self._stats[e['relative_path']][0],
+                         self._derivatives.get(e['relative_path'], {}).get('digest'),
+                         e['width'], e['height'], e['dominant_color'], e['lqip'])
+                        for e in upserts
+                    ]
+                )
+                conn.executemany('DELETE FROM images WHERE relative_path = ?', [(p,) for p in deletes])
+
+                # 目录表很小，整体重写即可
+                conn.execute('DELETE FROM directories')
+                conn.executemany(
+                    'INSERT INTO directories (rel_dir, mtime_ns) VALUES (?, ?)',
+                    list(self._dir_mtimes.items())
+                )
+        except sqlite3.Error as e:
+            # 索引写入失败不影响内存清单，下次启动会重新扫描
+            print(f"⚠️ 图片索引写入失败: {e}")
+
+
+def _dir_of(relative_path: str) -> str:
+    """相对路径所在的相对目录（根目录为''）"""
+    return relative_path.rsplit('/', 1)[0] if '/' in relative_path else ''
+
+
+# 按图片目录共享的索引实例
+_catalogs: Dict[str, ImageCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_image_catalog(images_dir: str, **kwargs) -> ImageCatalog:
+    """获取（或创建）指定图片目录的共享索引实例"""
+    with _catalogs_lock:
+        catalog = _catalogs.get(images_dir)
+        if catalog is None:
+            index_path = os.environ.get('IMAGE_CATALOG_PATH') or DEFAULT_INDEX_PATH
+            check_interval = float(os.environ.get('IMAGE_CATALOG_CHECK_INTERVAL') or 30)
+            catalog = ImageCatalog(images_dir, index_path, check_interval=check_interval, **kwargs)
+            _catalogs[images_dir] = catalog
+        return catalog
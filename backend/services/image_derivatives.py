@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地图片衍生图（缩略图/中等尺寸）生成服务
+参数与OSS模式的OSS_THUMBNAIL_PARAMS/OSS_MEDIUM_PARAMS保持一致，
+按原图内容哈希存放在内容寻址的缓存目录中，使用进程池并行生成；
+同一次解码顺带提取尺寸、主色和LQIP占位图，写回图片索引
+"""
+
+import base64
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from backend.config.config import Config
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 衍生图目录（位于前端static目录下，由静态文件服务直接提供）
+DERIVATIVES_DIR = os.environ.get('IMAGE_DERIVATIVES_DIR') or os.path.join(
+    _PROJECT_ROOT, 'frontend', 'static', 'derivatives'
+)
+DERIVATIVES_URL_PREFIX = '/static/derivatives'
+
+
+def parse_oss_process(params: str) -> Dict:
+    """解析x-oss-process参数，例如 ?x-oss-process=image/resize,w_300,h_300,m_lfit/quality,q_80/format,webp"""
+    preset = {'width': None, 'height': None, 'quality': 85, 'format': 'jpeg'}
+    match = re.search(r'w_(\d+)', params)
+    if match:
+        preset['width'] = int(match.group(1))
+    match = re.search(r'h_(\d+)', params)
+    if match:
+        preset['height'] = int(match.group(1))
+    match = re.search(r'q_(\d+)', params)
+    if match:
+        preset['quality'] = int(match.group(1))
+    match = re.search(r'format,(\w+)', params)
+    if match:
+        preset['format'] = match.group(1).lower()
+    return preset
+
+
+@lru_cache(maxsize=None)
+def webp_supported() -> bool:
+    """当前Pillow是否编译了WebP编码支持"""
+    try:
+        from PIL import features
+        return bool(features.check('webp'))
+    except Exception:
+        return False
+
+
+def _build_presets() -> Dict[str, Dict]:
+    presets = {
+        'thumbnail': parse_oss_process(Config.OSS_THUMBNAIL_PARAMS),
+        'medium': parse_oss_process(Config.OSS_MEDIUM_PARAMS),
+    }
+    if not webp_supported():
+        # Pillow未编译WebP支持时退回JPEG
+        for preset in presets.values():
+            if preset['format'] == 'webp':
+                preset['format'] = 'jpeg'
+    return presets
+
+
+# 衍生图预设：thumbnail对应列表卡片，medium对应详情页
+PRESETS = _build_presets()
+
+_EXTENSIONS = {'jpeg': 'jpg', 'jpg': 'jpg', 'webp': 'webp', 'png': 'png'}
+
+# LQIP占位图最长边（像素）和编码质量，WebP编码后约一两百字节
+LQIP_SIZE = 16
+LQIP_QUALITY = 40
+
+
+def derivative_filename(digest: str, preset_name: str) -> str:
+    """衍生图文件名：<原图内容哈希>-<预设名>.<格式>"""
+    fmt = PRESETS[preset_name]['format']
+    return f"{digest}-{preset_name}.{_EXTENSIONS.get(fmt, fmt)}"
+
+
+def derivative_url(digest: str, preset_name: str) -> str:
+    return f"{DERIVATIVES_URL_PREFIX}/{derivative_filename(digest, preset_name)}"
+
+
+def resize_image(source, width: Optional[int], height: Optional[int], quality: int, fmt: str, output):
+    """按m_lfit语义缩放（等比缩放到不超过w×h，不放大）并编码输出；source/output可以是路径或文件对象"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        _save_resized(img, width, height, quality, fmt, output)
+
+
+def _save_resized(img, width: Optional[int], height: Optional[int], quality: int, fmt: str, output):
+    from PIL import Image
+
+    if width or height:
+        img = img.copy()
+        img.thumbnail((width or img.width, height or img.height), Image.LANCZOS)
+
+    fmt = 'jpeg' if fmt == 'jpg' else fmt
+    if fmt == 'jpeg' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    save_kwargs = {'quality': quality}
+    if fmt == 'jpeg':
+        save_kwargs.update(optimize=True, progressive=True)
+    elif fmt == 'webp':
+        save_kwargs['method'] = 4
+    img.save(output, format=fmt.upper(), **save_kwargs)
+
+
+def dominant_color(img) -> str:
+    """主色：缩小后量化为5色，取像素最多的颜色，返回#rrggbb"""
+    small = img.convert('RGB')
+    small.thumbnail((64, 64))
+    quantized = small.quantize(colors=5)
+    palette = quantized.getpalette()
+    count, index = max(quantized.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def lqip_data_uri(img) -> str:
+    """生成LQIP占位图（最长边16px，优先WebP，JPEG头部表过大），返回data URI"""
+    small = img.convert('RGB')
+    small.thumbnail((LQIP_SIZE, LQIP_SIZE))
+    fmt = 'webp' if webp_supported() else 'jpeg'
+    buffer = io.BytesIO()
+    small.save(buffer, format=fmt.upper(), quality=LQIP_QUALITY)
+    return f'data:image/{fmt};base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def render_derivatives(source_path: str, output_dir: str, presets: Dict[str, Dict]) -> Optional[Dict]:
+    """进程池任务：解码一次原图，生成所有预设的衍生图并提取元数据，
+    返回{digest, width, height, dominant_color, lqip}"""
+    from PIL import Image, ImageOps
+
+    try:
+        with open(source_path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()[:20]
+
+        with Image.open(io.BytesIO(data)) as img:
+            img = ImageOps.exif_transpose(img)
+            img.load()
+
+            for preset_name, preset in presets.items():
+                fmt = preset['format']
+                target = os.path.join(output_dir, f"{digest}-{preset_name}.{_EXTENSIONS.get(fmt, fmt)}")
+                if os.path.exists(target):
+                    # 内容相同的图片共用衍生图
+                    continue
+
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                _save_resized(img, preset['width'], preset['height'], preset['quality'], fmt, tmp_path)
+                os.replace(tmp_path, target)
+
+            return {
+                'digest': digest,
+                'width': img.width,
+                'height': img.height,
+                'dominant_color': dominant_color(img),
+                'lqip': lqip_data_uri(img)
+            }
+    except Exception as e:
+        print(f"生成衍生图失败 {source_path}: {e}")
+        return None
+
+
+class DerivativePipeline:
+    """衍生图流水线 - 监听图片索引变化，把缺少衍生图的图片交给进程池处理"""
+
+    # 每批提交给索引的结果数
+    BATCH_SIZE = 16
+
+    def __init__(self, catalog, output_dir: str = DERIVATIVES_DIR, workers: int = None):
+        self.catalog = catalog
+        self.output_dir = output_dir
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._pending = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台调度线程，并处理索引中已有的待生成图片"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.catalog.add_listener(self._on_catalog_change)
+        self._thread = threading.Thread(target=self._run, name='image-derivatives', daemon=True)
+        self._thread.start()
+        self._pending.set()
+        print(f"🖼️ 衍生图流水线已启动: {self.output_dir} (进程数: {self.workers})")
+
+    def _on_catalog_change(self, upserts: List[Dict], deletes: List[str]):
+        if upserts:
+            self._pending.set()
+
+    def _run(self):
+        # spawn避免在多线程进程中fork
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            while True:
+                self._pending.wait()
+                self._pending.clear()
+                try:
+                    self._process(pool)
+                except Exception as e:
+                    print(f"衍生图流水线异常: {e}")
+
+    def _process(self, pool: ProcessPoolExecutor):
+        jobs: List[Tuple[str, tuple]] = self.catalog.pending_derivatives()
+        if not jobs:
+            return
+
+        print(f"🖼️ 开始生成衍生图: {len(jobs)}张")
+        futures = [
+            (relative_path, stats, pool.submit(
+                render_derivatives,
+                os.path.join(self.catalog.images_dir, relative_path),
+                self.output_dir,
+                PRESETS
+            ))
+            for relative_path, stats in jobs
+        ]
+
+        # 分批持久化，整轮结束后才失效缓存/递增一次images版本，避免每批都触发品牌快照重建
+        results, failures = {}, {}
+        for relative_path, stats, future in futures:
+            info = future.result()
+            if info:
+                results[relative_path] = (stats, info)
+            else:
+                failures[relative_path] = stats
+            if len(results) >= self.BATCH_SIZE:
+                self.catalog.set_derivatives(results, notify=False)
+                results = {}
+        self.catalog.set_derivatives(results, failures)
+        print(f"✅ 衍生图生成完成: {len(jobs) - len(failures)}张"
+              + (f", 失败{len(failures)}张（文件变化后重试）" if failures else ""))
+
+
+_pipeline: Optional[DerivativePipeline] = None
+
+
+def start_derivative_pipeline(catalog, workers: int = None) -> DerivativePipeline:
+    """启动（进程内唯一的）衍生图流水线"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = DerivativePipeline(catalog, workers=workers)
+        _pipeline.start()
+    return _pipeline
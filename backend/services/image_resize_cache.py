@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按需缩放图片服务
+/api/view 支持 w/h/q/fmt 参数（语义同OSS x-oss-process的resize,m_lfit/quality/format），
+首次请求时生成并写入磁盘缓存，缓存按(路径, mtime, 参数)寻址，
+同一规格的并发请求只有一个线程真正执行缩放
+
+缓存目录由所有worker进程共用，容量上限针对整个目录：
+- 命中时刷新文件的atime（mtime不变，ETag不受影响）作为最近使用时间
+- 生成新文件后定期扫描目录，超过容量时删除最近使用时间最早的文件，
+  最近MIN_AGE秒内用过的文件不删除，避免删掉其他进程正要发送的文件
+- 每次请求都以磁盘为准，文件已被淘汰时重新生成
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from backend.services.image_derivatives import resize_image, webp_supported
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_DIR = os.path.join(_PROJECT_ROOT, 'data', 'resize_cache')
+
+# 允许的参数范围，防止任意尺寸把缓存刷满
+MAX_DIMENSION = 2000
+DEFAULT_QUALITY = 85
+FORMATS = {'webp': 'webp', 'jpeg': 'jpg', 'jpg': 'jpg', 'png': 'png'}
+MIMETYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg', 'png': 'image/png'}
+
+
+def parse_resize_params(args) -> Optional[Dict]:
+    """从请求参数解析缩放规格，没有任何缩放参数时返回None（直接返回原图）"""
+    if not any(args.get(key) for key in ('w', 'h', 'q', 'fmt')):
+        return None
+
+    def dimension(key):
+        value = args.get(key, type=int)
+        if not value or value <= 0:
+            return None
+        return min(value, MAX_DIMENSION)
+
+    fmt = (args.get('fmt') or 'jpeg').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的图片格式: {fmt}")
+    if fmt == 'webp' and not webp_supported():
+        raise ValueError("服务器未启用WebP支持，请使用jpeg或png格式")
+
+    quality = args.get('q', type=int) or DEFAULT_QUALITY
+    return {
+        'width': dimension('w'),
+        'height': dimension('h'),
+        'quality': max(1, min(quality, 100)),
+        'format': fmt
+    }
+
+
+class ResizeCache:
+    """缩放结果磁盘缓存 - 多进程共用目录，按文件最近使用时间（atime/mtime）淘汰"""
+
+    # 命中时最多每TOUCH_INTERVAL秒刷新一次atime
+    TOUCH_INTERVAL = 60
+    # 最近MIN_AGE秒内使用过的文件不淘汰（需大于TOUCH_INTERVAL）
+    MIN_AGE = 300
+    # 两次扫描目录之间的最短间隔（秒）
+    EVICT_INTERVAL = 30
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._last_evict = 0.0
+        self._usage = {'files': 0, 'bytes': 0, 'evicted': 0}   # 最近一次扫描的结果
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, source_path: str, params: Dict, stats: Tuple[int, int] = None) -> Tuple[str, str]:
+        """返回(缓存文件路径, mimetype)，缓存不存在（或已被淘汰）时生成；stats为已知的原图(mtime_ns, size)"""
+        if stats is None:
+            stat = os.stat(source_path)
+            stats = (stat.st_mtime_ns, stat.st_size)
+        ext = FORMATS[params['format']]
+        key = hashlib.sha1(
+            f"{source_path}|{stats[0]}|{stats[1]}|{params['width']}|{params['height']}|"
+            f"{params['quality']}|{ext}".encode('utf-8')
+        ).hexdigest()
+        filename = f"{key}.{ext}"
+        path = os.path.join(self.cache_dir, filename)
+
+        while True:
+            if self._touch(path):
+                return path, MIMETYPES[ext]
+
+            with self._lock:
+                event = self._inflight.get(filename)
+                if event is None:
+                    if os.path.isfile(path):
+                        # 其他线程刚生成完
+                        continue
+                    # 当前线程负责生成
+                    event = self._inflight[filename] = threading.Event()
+                    break
+
+            # 其他线程正在生成同一规格，等待后重新查询
+            event.wait()
+
+        try:
+            self._render(source_path, params, path)
+        finally:
+            with self._lock:
+                self._inflight.pop(filename, None)
+            event.set()
+
+        self._maybe_evict()
+        return path, MIMETYPES[ext]
+
+    def _touch(self, path: str) -> bool:
+        """缓存文件存在时刷新其最近使用时间并返回True"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        now = time.time()
+        if now - max(stat.st_atime, stat.st_mtime) >= self.TOUCH_INTERVAL:
+            try:
+                os.utime(path, ns=(int(now * 1e9), stat.st_mtime_ns))
+            except OSError:
+                return False
+        return True
+
+    def _render(self, source_path: str, params: Dict, path: str):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            resize_image(source_path, params['width'], params['height'],
+                         params['quality'], params['format'], tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _maybe_evict(self):
+        """距上次扫描超过EVICT_INTERVAL时扫描缓存目录并淘汰，其他线程正在扫描时跳过"""
+        if time.monotonic() - self._last_evict < self.EVICT_INTERVAL:
+            return
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_evict = time.monotonic()
+            self._evict()
+        except OSError as e:
+            print(f"缩放缓存淘汰失败: {e}")
+        finally:
+            self._evict_lock.release()
+
+    def _evict(self):
+        """按最近使用时间从早到晚删除文件，直到目录总大小不超过上限"""
+        now = time.time()
+        files, total = [], 0
+        with os.scandir(self.cache_dir) as it:
+            for item in it:
+                try:
+                    if not item.is_file():
+                        continue
+                    stat = item.stat()
+                except OSError:
+                    continue
+                used_at = max(stat.st_atime, stat.st_mtime)
+                if item.name.endswith('.tmp'):
+                    # 生成中途退出的进程遗留的临时文件
+                    if now - used_at >= self.MIN_AGE:
+                        self._remove(item.path)
+                    continue
+                files.append((used_at, item.path, stat.st_size))
+                total += stat.st_size
+
+        evicted = 0
+        if total > self.max_bytes:
+            for used_at, path, size in sorted(files):
+                if total <= self.max_bytes or now - used_at < self.MIN_AGE:
+                    break
+                self._remove(path)
+                total -= size
+                evicted += 1
+
+        self._usage = {
+            'files': len(files) - evicted,
+            'bytes': total,
+            'evicted': self._usage['evicted'] + evicted
+        }
+        if evicted:
+            print(f"🗂️ 缩放缓存已淘汰{evicted}个文件, 剩余{total / 1024 / 1024:.1f}MB")
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            # 其他进程已删除
+            pass
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            inflight = len(self._inflight)
+        return {**self._usage, 'max_bytes': self.max_bytes, 'inflight': inflight}
+
+
+_resize_cache: Optional[ResizeCache] = None
+_resize_cache_lock = threading.Lock()
+
+
+def get_resize_cache() -> ResizeCache:
+    """获取全局缩放缓存"""
+    global _resize_cache
+    with _resize_cache_lock:
+        if _resize_cache is None:
+            cache_dir = os.environ.get('IMAGE_RESIZE_CACHE_DIR') or DEFAULT_CACHE_DIR
+            max_mb = float(os.environ.get('IMAGE_RESIZE_CACHE_MAX_MB') or 512)
+            _resize_cache = ResizeCache(cache_dir, int(max_mb * 1024 * 1024))
+        return _resize_cache
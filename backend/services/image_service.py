@@ -8,9 +8,20 @@ import os
 import re
 from typing import List, Dict, Optional
 
+from backend.services.image_catalog import get_image_catalog
+
 class ImageService:
     """图片处理服务类 - 专注本地图片处理，性能优化版"""
     
+    # 需要排除的社交图标文件
+    SOCIAL_ICONS = {
+        'taobao.png', 'taobao.jpg', 'taobao.jpeg',
+        'xiaohongshu.png', 'xiaohongshu.jpg', 'xiaohongshu.jpeg',
+        'weidian.png', 'weidian.jpg', 'weidian.jpeg',
+        'wechat.png', 'wechat.jpg', 'wechat.jpeg',
+        'logo.png', 'logo.jpg', 'logo.jpeg', 'logo.svg'  # 也排除logo文件
+    }
+    
     def __init__(self, images_dir: str = None):
         """初始化图片服务"""
         if images_dir is None:
@@ -23,6 +34,14 @@ class ImageService:
         self.images_dir = images_dir
         self.allowed_extensions = {'jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp'}
         
+        # 图片索引按目录共享，服务实例本身是轻量的
+        self.catalog = get_image_catalog(
+            self.images_dir,
+            parse_filename=self.parse_filename,
+            is_allowed_file=self.is_allowed_file,
+            excluded_names=self.SOCIAL_ICONS
+        )
+        
         print(f"📁 本地图片服务初始化: {self.images_dir}")
     
     def parse_filename(self, filename: str) -> Dict[str, str]:
@@ -68,137 +87,22 @@ class ImageService:
         return '.' in filename and filename.rsplit('.', 1)[1].lower() in self.allowed_extensions
     
     def get_all_images(self) -> List[Dict]:
-        """获取所有图片信息 - 带缓存的本地版本"""
-        # 使用缓存避免重复扫描
-        from backend.services.cache_service import cache_service
-        cache_key = "all_images_local"
-        cached_images = cache_service.get(cache_key)
-        if cached_images:
-            print(f"✅ 从缓存获取所有图片: {len(cached_images)}张")
-            return cached_images
-        
-        print("📁 扫描本地图片目录...")
-        images = self._scan_local_images()
-        
-        # 缓存结果（15分钟）
-        cache_service.set(cache_key, images, ttl=900)
-        print(f"✅ 图片数据已缓存: {len(images)}张图片")
-        
-        return images
+        """获取所有图片信息 - 读取持久化的图片索引"""
+        return self.catalog.get_images()
     
-    def _scan_local_images(self) -> List[Dict]:
-        """扫描本地图片文件"""
-        images = []
-        
-        if not os.path.exists(self.images_dir):
-            print(f"⚠️ 本地图片目录不存在: {self.images_dir}")
-            return images
-        
-        # 定义需要排除的社交图标文件
-        social_icons = {
-            'taobao.png', 'taobao.jpg', 'taobao.jpeg',
-            'xiaohongshu.png', 'xiaohongshu.jpg', 'xiaohongshu.jpeg',
-            'weidian.png', 'weidian.jpg', 'weidian.jpeg',
-            'wechat.png', 'wechat.jpg', 'wechat.jpeg',
-            'logo.png', 'logo.jpg', 'logo.jpeg', 'logo.svg'  # 也排除logo文件
-        }
-        
-        # 扫描根目录下的图片文件
-        for filename in os.listdir(self.images_dir):
-            if self.is_allowed_file(filename) and filename.lower() not in social_icons:
-                filepath = os.path.join(self.images_dir, filename)
-                if os.path.isfile(filepath):
-                    parsed_info = self.parse_filename(filename)
-                    images.append({
-                        'filename': filename,
-                        'relative_path': filename,
-                        'brand_name': parsed_info['brand_name'],
-                        'image_type': parsed_info['image_type'],
-                        'color': parsed_info['color'],
-                        'has_color': parsed_info['has_color'],
-                        'size': os.path.getsize(filepath),
-                        # 本地图片URL
-                        'url': f"/static/images/{filename}",
-                        'thumbnail': f"/static/images/{filename}",
-                        'original': f"/static/images/{filename}"
-                    })
-        
-        # 扫描子文件夹中的图片
-        for item in os.listdir(self.images_dir):
-            item_path = os.path.join(self.images_dir, item)
-            if os.path.isdir(item_path):
-                for filename in os.listdir(item_path):
-                    if self.is_allowed_file(filename) and filename.lower() not in social_icons:
-                        filepath = os.path.join(item_path, filename)
-                        if os.path.isfile(filepath):
-                            parsed_info = self.parse_filename(filename)
-                            relative_path = f"{item}/{filename}"
-                            images.append({
-                                'filename': filename,
-                                'relative_path': relative_path,
-                                'brand_name': parsed_info['brand_name'] or item,
-                                'image_type': parsed_info['image_type'],
-                                'color': parsed_info['color'],
-                                'has_color': parsed_info['has_color'],
-                                'size': os.path.getsize(filepath),
-                                # 本地图片URL
-                                'url': f"/static/images/{relative_path}",
-                                'thumbnail': f"/static/images/{relative_path}",
-                                'original': f"/static/images/{relative_path}"
-                            })
-        
-        print(f"📁 本地图片扫描完成: 共{len(images)}张图片")
-        return sorted(images, key=lambda x: x['brand_name'] or '')
+    def get_brand_index(self) -> 'BrandImageIndex':
+        """获取当前图片索引版本对应的品牌倒排索引"""
+        return self.catalog.derived('brand_index', self._build_brand_index)
     
     def get_brand_images(self, brand_name: str) -> List[Dict]:
-        """获取指定品牌的所有图片 - 带缓存的本地版本"""
-        # 使用缓存避免重复查询
-        from backend.services.cache_service import cache_service
-        cache_key = f"brand_images_{brand_name}"
-        cached_images = cache_service.get(cache_key)
-        if cached_images:
-            print(f"✅ 从缓存获取品牌图片: {brand_name} ({len(cached_images)}张)")
-            return cached_images
-        
-        print(f"📁 查找品牌图片: {brand_name}")
-        all_images = self.get_all_images()
-        
-        # 首先尝试精确匹配
-        exact_matches = [img for img in all_images if img['brand_name'] == brand_name]
-        if exact_matches:
-            print(f"📁 精确匹配找到: {len(exact_matches)}张图片")
-            # 缓存结果（2小时，图片很少变化）
-            cache_service.set(cache_key, exact_matches, ttl=7200)
-            return self.sort_images_by_priority(exact_matches)
-        
-        # 如果精确匹配失败，尝试模糊匹配
-        print(f"📁 精确匹配失败，尝试模糊匹配: {brand_name}")
-        fuzzy_matches = []
-        
-        # 去除括号内容进行匹配
-        clean_brand = brand_name.split('(')[0].strip() if '(' in brand_name else brand_name
-        
-        for img in all_images:
-            img_brand = img['brand_name']
-            clean_img_brand = img_brand.split('(')[0].strip() if '(' in img_brand else img_brand
-            
-            # 多种匹配策略
-            if (clean_brand == clean_img_brand or 
-                clean_brand in img_brand or 
-                img_brand in clean_brand or
-                clean_img_brand in clean_brand):
-                fuzzy_matches.append(img)
-        
-        if fuzzy_matches:
-            print(f"📁 模糊匹配找到: {len(fuzzy_matches)}张图片")
-            # 缓存结果（10分钟）
-            cache_service.set(cache_key, fuzzy_matches, ttl=600)
-            return self.sort_images_by_priority(fuzzy_matches)
-        
-        print(f"📁 未找到品牌图片: {brand_name}")
-        # 缓存空结果（5分钟）
-        cache_service.set(cache_key, [], ttl=300)
-        return []
+        """获取指定品牌的所有图片 - 基于品牌倒排索引"""
+        images = self.get_brand_index().lookup(brand_name)
+        if not images:
+            print(f"📁 未找到品牌图片: {brand_name}")
+        return images
+    
+    def _build_brand_index(self, images: List[Dict]) -> 'BrandImageIndex':
+        return BrandImageIndex(images, self.sort_images_by_priority)
     
     def sort_images_by_priority(self, images: List[Dict]) -> List[Dict]:
         """按图片类型优先级排序"""
@@ -273,4 +177,72 @@ class ImageService:
         
         # 缓存筛选选项（10分钟）
         cache_service.set(cache_key, options, ttl=600)
-        return options
\ No newline at end of file
+        return options
+
+
+class BrandImageIndex:
+    """品牌 -> 图片倒排索引，每个图片索引版本构建一次，列表预先按类型优先级排好序"""
+    
+    # 模糊匹配结果缓存上限
+    FUZZY_CACHE_SIZE = 256
+    # 模糊匹配最多合并的品牌数
+    FUZZY_LIMIT = 20
+    
+    def __init__(self, images: List[Dict], sort_func):
+        self.exact: Dict[str, List[Dict]] = {}   # 完整品牌名（含颜色）
+        self.base: Dict[str, List[Dict]] = {}    # 基础品牌名（去掉括号颜色）
+        self.color: Dict[str, List[Dict]] = {}   # 颜色
+        self._sort = sort_func
+        self._fuzzy_cache: Dict[str, List[Dict]] = {}
+        
+        for img in images:
+            brand_name = img['brand_name'] or ''
+            base_name = self.clean_name(brand_name)
+            self.exact.setdefault(brand_name, []).append(img)
+            self.base.setdefault(base_name, []).append(img)
+            
+            color = img.get('color')
+            if not color and '(' in brand_name and ')' in brand_name:
+                color = brand_name.split('(')[1].split(')')[0]
+            if color:
+                self.color.setdefault(color, []).append(img)
+        
+        for mapping in (self.exact, self.base, self.color):
+            for key, brand_images in mapping.items():
+                mapping[key] = sort_func(brand_images)
+    
+    @staticmethod
+    def clean_name(brand_name: str) -> str:
+        """去除括号内容"""
+        return brand_name.split('(')[0].strip() if '(' in brand_name else brand_name
+    
+    def lookup(self, brand_name: str) -> List[Dict]:
+        """精确匹配优先，失败后通过共享的n-gram匹配器做模糊匹配"""
+        images = self.exact.get(brand_name)
+        if images:
+            return images
+        
+        if brand_name in self._fuzzy_cache:
+            return self._fuzzy_cache[brand_name]
+        
+        # 模糊匹配：基础名相同或互相包含的品牌
+        from backend.services.brand_matcher import get_brand_matcher
+        candidates = get_brand_matcher().match(
+            brand_name, source='images', limit=self.FUZZY_LIMIT, containment_only=True
+        )
+        matched = []
+        for img_brand, _score in sorted(candidates):
+            matched.extend(self.exact.get(img_brand, []))
+        
+        images = self._sort(matched) if matched else []
+        if len(self._fuzzy_cache) < self.FUZZY_CACHE_SIZE:
+            self._fuzzy_cache[brand_name] = images
+        return images
+    
+    def get_by_base(self, base_name: str) -> List[Dict]:
+        """按基础品牌名获取图片（包含所有颜色）"""
+        return self.base.get(base_name, [])
+    
+    def get_by_color(self, color: str) -> List[Dict]:
+        """按颜色获取图片"""
+        return self.color.get(color, [])
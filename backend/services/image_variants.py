@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片格式协商服务
+为每张原图在同目录下预先编码WebP（以及可用时的AVIF）兄弟文件，例如 foo.jpg -> foo.jpg.webp，
+请求时根据Accept头返回浏览器支持的最小版本，并带上 Vary: Accept
+
+批量编码整个图片目录：
+    python -m backend.services.image_variants [图片目录]
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 兄弟文件格式：扩展名 -> (mimetype, Pillow格式名, 编码质量)，按优先级排列
+VARIANT_FORMATS = {
+    'avif': ('image/avif', 'AVIF', 60),
+    'webp': ('image/webp', 'WEBP', 82),
+}
+
+# 可以生成兄弟文件的原图格式
+SOURCE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'bmp'}
+
+_encoders: Optional[List[str]] = None
+
+
+def available_encoders() -> List[str]:
+    """当前环境可用的编码格式（AVIF需要pillow-avif-plugin或自带AVIF的Pillow）"""
+    global _encoders
+    if _encoders is None:
+        try:
+            from PIL import Image, features
+        except ImportError:
+            _encoders = []
+            return _encoders
+
+        try:
+            import pillow_avif  # noqa: F401  注册AVIF编码器
+        except ImportError:
+            pass
+
+        Image.init()
+        _encoders = [
+            ext for ext, (_, pil_format, _) in VARIANT_FORMATS.items()
+            if pil_format in Image.SAVE and (ext != 'webp' or features.check('webp'))
+        ]
+    return _encoders
+
+
+def is_variant_file(filename: str) -> bool:
+    """是否为兄弟文件（foo.jpg.webp），图片索引扫描时需要跳过"""
+    parts = filename.lower().rsplit('.', 2)
+    return len(parts) == 3 and parts[2] in VARIANT_FORMATS and parts[1] in SOURCE_EXTENSIONS
+
+
+def variant_path(path: str, ext: str) -> str:
+    return f"{path}.{ext}"
+
+
+def negotiate(path: str, accept_mimetypes, stats: Tuple[int, int] = None) -> Optional[Tuple[str, str]]:
+    """根据Accept选择最小的可用兄弟文件，返回(路径, mimetype)；没有合适版本时返回None
+
+    文件状态来自内存中的校验值缓存，每个文件最多每RECHECK_INTERVAL秒stat一次；stats为已知的原图(mtime_ns, size)
+    """
+    from backend.utils.file_offload import file_validators
+
+    source_ext = path.rsplit('.', 1)[-1].lower()
+    if source_ext not in SOURCE_EXTENSIONS:
+        return None
+
+    wanted = [
+        (ext, mimetype) for ext, (mimetype, _, _) in VARIANT_FORMATS.items()
+        # 只认明确声明的类型，不因*/*返回浏览器可能不支持的格式
+        if any(value == mimetype and quality > 0 for value, quality in accept_mimetypes)
+    ]
+    if not wanted:
+        return None
+
+    source = file_validators.lookup(path, stats)
+    if source is None:
+        return None
+
+    best = None
+    best_size = source.size
+    for ext, mimetype in wanted:
+        candidate = variant_path(path, ext)
+        validators = file_validators.lookup(candidate)
+        # 原图比兄弟文件新说明原图已被替换，兄弟文件作废
+        if validators is None or validators.mtime_ns < source.mtime_ns or validators.size >= best_size:
+            continue
+        best, best_size = (candidate, mimetype), validators.size
+    return best
+
+
+def send_negotiated(path: str, root: str, internal_prefix: str, stats: Tuple[int, int] = None, **kwargs):
+    """发送原图或协商出的兄弟文件（可卸载给反向代理），并声明响应随Accept变化"""
+    from flask import request
+    from backend.utils.file_offload import send_file_offloaded
+
+    variant = negotiate(path, request.accept_mimetypes, stats)
+    if variant:
+        response = send_file_offloaded(variant[0], root, internal_prefix, mimetype=variant[1], **kwargs)
+    else:
+        response = send_file_offloaded(path, root, internal_prefix, stats=stats, **kwargs)
+    response.vary.add('Accept')
+    return response
+
+
+def register_static_negotiation(app, images_prefix: str = 'images/'):
+    """包装Flask静态文件视图，static/images下的图片按Accept返回兄弟文件"""
+    static_view = app.view_functions.get('static')
+    if static_view is None:
+        return
+
+    def negotiated_static(filename):
+        if not filename.startswith(images_prefix):
+            return static_view(filename=filename)
+
+        from flask import request
+        from werkzeug.security import safe_join
+
+        path = safe_join(app.static_folder, filename)
+        variant = negotiate(path, request.accept_mimetypes) if path else None
+        if variant:
+            from flask import send_file
+            response = send_file(variant[0], mimetype=variant[1],
+                                 max_age=app.get_send_file_max_age(filename))
+        else:
+            response = static_view(filename=filename)
+        response.vary.add('Accept')
+        return response
+
+    app.view_functions['static'] = negotiated_static
+
+
+# ----------------------------------------------------------------------
+# 批量编码
+# ----------------------------------------------------------------------
+def encode_variants(source_path: str, formats: List[str]) -> int:
+    """进程池任务：为单张原图生成缺失或过期的兄弟文件，返回生成数量"""
+    from PIL import Image, ImageOps
+
+    try:
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+
+    try:
+        source_mtime = os.stat(source_path).st_mtime_ns
+        targets = []
+        for ext in formats:
+            target = variant_path(source_path, ext)
+            try:
+                if os.stat(target).st_mtime_ns >= source_mtime:
+                    continue
+            except OSError:
+                pass
+            targets.append((ext, target))
+
+        if not targets:
+            return 0
+
+        with Image.open(source_path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+            for ext, target in targets:
+                _, pil_format, quality = VARIANT_FORMATS[ext]
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                img.save(tmp_path, format=pil_format, quality=quality)
+                os.replace(tmp_path, target)
+        return len(targets)
+    except Exception as e:
+        print(f"编码兄弟文件失败 {source_path}: {e}")
+        return 0
+
+
+def encode_all(paths: Iterable[str], workers: int = None) -> int:
+    """使用进程池批量编码，返回生成的文件数量"""
+    formats = available_encoders()
+    paths = [p for p in paths if p.rsplit('.', 1)[-1].lower() in SOURCE_EXTENSIONS]
+    if not formats or not paths:
+        return 0
+
+    workers = workers or min(4, os.cpu_count() or 1)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return sum(pool.map(encode_variants, paths, [formats] * len(paths), chunksize=8))
+
+
+class VariantEncoder:
+    """后台编码任务 - 启动时补齐整个图片索引的兄弟文件，之后跟随索引变化增量编码"""
+
+    def __init__(self, catalog, workers: int = None):
+        self.catalog = catalog
+        self.workers = workers
+        self._pending: set = set()
+        self._full_pass = True
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        if not available_encoders():
+            print("⚠️ Pillow不支持WebP/AVIF编码，跳过图片格式协商的预编码")
+            return
+
+        self.catalog.add_listener(self._on_catalog_change)
+        self._thread = threading.Thread(target=self._run, name='image-variants', daemon=True)
+        self._thread.start()
+        self._wakeup.set()
+        print(f"🎞️ 图片兄弟文件编码已启动: {', '.join(available_encoders())}")
+
+    def _on_catalog_change(self, upserts: List[Dict], deletes: List[str]):
+        # 原图删除后清理对应的兄弟文件
+        for relative_path in deletes:
+            for ext in VARIANT_FORMATS:
+                try:
+                    os.remove(variant_path(os.path.join(self.catalog.images_dir, relative_path), ext))
+                except OSError:
+                    pass
+
+        with self._lock:
+            self._pending.update(e['relative_path'] for e in upserts)
+        if upserts:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                if self._full_pass:
+                    relative_paths = [img['relative_path'] for img in self.catalog.get_images()]
+                    self._full_pass = False
+                else:
+                    relative_paths = sorted(self._pending)
+                self._pending.clear()
+
+            try:
+                count = encode_all(
+                    [os.path.join(self.catalog.images_dir, p) for p in relative_paths],
+                    workers=self.workers
+                )
+                if count:
+                    print(f"✅ 图片兄弟文件编码完成: {count}个")
+            except Exception as e:
+                print(f"图片兄弟文件编码异常: {e}")
+
+
+_encoder: Optional[VariantEncoder] = None
+
+
+def start_variant_encoder(catalog, workers: int = None) -> VariantEncoder:
+    """启动（进程内唯一的）后台编码任务"""
+    global _encoder
+    if _encoder is None:
+        _encoder = VariantEncoder(catalog, workers=workers)
+        _encoder.start()
+    return _encoder
+
+
+def main():
+    """命令行批量编码整个图片目录"""
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    images_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'frontend', 'static', 'images')
+
+    paths = []
+    for root, _, files in os.walk(images_dir):
+        paths.extend(os.path.join(root, name) for name in files if not is_variant_file(name))
+
+    print(f"🎞️ 开始编码: {images_dir} ({len(paths)}个文件, 格式: {', '.join(available_encoders()) or '无'})")
+    count = encode_all(paths)
+    print(f"✅ 编码完成: 生成{count}个兄弟文件")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片目录监听服务
+Linux下通过inotify把文件新建/改名/删除事件增量推送到图片索引，
+其他平台（或inotify不可用时）退化为定时检查目录mtime
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from typing import Dict, Optional
+
+# inotify事件掩码
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _Inotify:
+    """基于ctypes的最小inotify封装，不引入额外依赖"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        # 非Linux平台没有这些符号，会抛出AttributeError
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1失败')
+
+    def add_watch(self, path: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch失败: {path}')
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float):
+        """读取事件，返回[(wd, mask, name)]"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ImageWatcher:
+    """图片目录监听器 - 把文件变化增量应用到ImageCatalog"""
+
+    def __init__(self, catalog, poll_interval: float = 10, debounce: float = 0.3):
+        self.catalog = catalog
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.mode = None
+        self._inotify: Optional[_Inotify] = None
+        self._watches: Dict[int, str] = {}   # wd -> 相对目录（''表示根目录）
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台监听线程"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        # 先确保索引已加载并与磁盘一致
+        self.catalog.get_images()
+
+        try:
+            self._inotify = _Inotify()
+            self._add_tree_watches()
+            self.mode = 'inotify'
+            target = self._inotify_loop
+            # 事件推送已覆盖变化，关闭请求路径上的惰性检查
+            self.catalog.check_interval = None
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify不可用，改用轮询监听图片目录: {e}")
+            if self._inotify:
+                self._inotify.close()
+                self._inotify = None
+            self.mode = 'polling'
+            target = self._polling_loop
+
+        self._thread = threading.Thread(target=target, name='image-watcher', daemon=True)
+        self._thread.start()
+        print(f"👀 图片目录监听已启动 ({self.mode}): {self.catalog.images_dir}")
+
+    def stop(self):
+        """停止监听"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    # ------------------------------------------------------------------
+    # inotify模式
+    # ------------------------------------------------------------------
+    def _add_tree_watches(self):
+        """监听根目录及一级子目录"""
+        self._watch_dir('')
+        for name in os.listdir(self.catalog.images_dir):
+            if os.path.isdir(os.path.join(self.catalog.images_dir, name)):
+                self._watch_dir(name)
+
+    def _watch_dir(self, rel_dir: str):
+        path = os.path.join(self.catalog.images_dir, rel_dir) if rel_dir else self.catalog.images_dir
+        try:
+            wd = self._inotify.add_watch(path)
+            self._watches[wd] = rel_dir
+        except OSError as e:
+            print(f"⚠️ 无法监听目录 {path}: {e}")
+
+    def _unwatch_dir(self, rel_dir: str):
+        for wd, watched in list(self._watches.items()):
+            if watched == rel_dir:
+                self._inotify.rm_watch(wd)
+                self._watches.pop(wd, None)
+
+    def _inotify_loop(self):
+        while not self._stop.is_set():
+            try:
+                events = self._inotify.read_events(timeout=1)
+                if not events:
+                    continue
+
+                # 合并短时间内的连续事件（批量复制、覆盖写入等）
+                deadline = time.time() + self.debounce
+                while time.time() < deadline:
+                    more = self._inotify.read_events(timeout=max(deadline - time.time(), 0))
+                    if not more:
+                        break
+                    events.extend(more)
+
+                self._apply_events(events)
+            except Exception as e:
+                print(f"图片目录监听异常: {e}")
+                time.sleep(1)
+
+    def _apply_events(self, events):
+        """把inotify事件转换为索引增量更新"""
+        changed_paths = set()
+        changed_dirs = set()
+
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出，退回目录mtime检查
+                self.catalog.refresh()
+                continue
+
+            rel_dir = self._watches.get(wd)
+            if rel_dir is None:
+                continue
+
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                changed_dirs.add(rel_dir)
+                continue
+
+            if mask & IN_ISDIR:
+                # 只处理根目录下的子目录变化
+                if rel_dir == '':
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._watch_dir(name)
+                    elif mask & IN_MOVED_FROM:
+                        # 改名后的目录仍会沿用旧的wd，需要移除
+                        self._unwatch_dir(name)
+                    changed_dirs.add(name)
+                continue
+
+            # 文件创建时可能尚未写完，等IN_CLOSE_WRITE再处理
+            if mask & IN_CREATE:
+                continue
+            changed_paths.add(f"{rel_dir}/{name}" if rel_dir else name)
+
+        if changed_dirs:
+            self.catalog.apply_dirs(sorted(changed_dirs))
+        if changed_paths:
+            self.catalog.apply_paths(changed_paths)
+
+    # ------------------------------------------------------------------
+    # 轮询模式
+    # ------------------------------------------------------------------
+    def _polling_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.catalog.refresh()
+            except Exception as e:
+                print(f"图片目录轮询异常: {e}")
+
+
+_watcher: Optional[ImageWatcher] = None
+
+
+def start_image_watcher(catalog, poll_interval: float = 10) -> ImageWatcher:
+    """启动（进程内唯一的）图片目录监听器"""
+    global _watcher
+    if _watcher is None:
+        _watcher = ImageWatcher(catalog, poll_interval=poll_interval)
+        _watcher.start()
+    return _watcher
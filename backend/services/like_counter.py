@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+点赞计数写缓冲（write-behind）
+热门布料短时间内集中点赞时，每次点赞都对brand_like_stats的同一行执行
+ON DUPLICATE KEY UPDATE，写入在该行的行锁上排队。这里把点赞数的增减先记在进程内：
+- 按品牌名分片加锁累加增量，点赞请求只修改内存，立即计入对外返回的点赞数
+- 后台线程每FLUSH_INTERVAL秒把各品牌的增量合并，用一次executemany批量写回brand_like_stats
+- 进程正常退出时（atexit）把剩余增量写回
+- 写回成功后递增一次likes数据版本，点赞高峰期品牌快照最多每个写回周期刷新一次
+
+brand_likes中的点赞记录仍在请求内同步写入，只有统计表延迟更新
+"""
+
+import atexit
+import threading
+import time
+from typing import Dict, Iterable
+
+# 分片数量（按品牌名哈希分片，减少并发点赞时的锁竞争）
+SHARDS = 16
+
+
+class _Shard:
+    __slots__ = ('lock', 'deltas')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas: Dict[str, int] = {}
+
+
+class LikeCounter:
+    """分片的点赞增量缓冲 - 品牌名 -> 尚未写入brand_like_stats的增量"""
+
+    # 批量写回间隔（秒）
+    FLUSH_INTERVAL = 0.3
+
+    def __init__(self, shards: int = SHARDS):
+        self._shards = [_Shard() for _ in range(shards)]
+        # 正在写回的增量：写回提交前仍计入对外的点赞数
+        self._inflight: Dict[str, int] = {}
+        self._flush_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._flushing = False
+        self._stats = {'added': 0, 'flushes': 0, 'flushed_rows': 0, 'flush_errors': 0}
+
+    def _shard(self, brand_name: str) -> _Shard:
+        return self._shards[hash(brand_name) % len(self._shards)]
+
+    # ------------------------------------------------------------------
+    # 记录与读取
+    # ------------------------------------------------------------------
+    def add(self, brand_name: str, delta: int):
+        """记录点赞数增减，并安排后台写回"""
+        shard = self._shard(brand_name)
+        with shard.lock:
+            shard.deltas[brand_name] = shard.deltas.get(brand_name, 0) + delta
+        with self._state_lock:
+            self._stats['added'] += 1
+            if self._flushing:
+                return
+            self._flushing = True
+        threading.Thread(target=self._flush_loop, name='like-counter', daemon=True).start()
+
+    def pending(self, brand_name: str) -> int:
+        """尚未写入数据库的增量"""
+        shard = self._shard(brand_name)
+        with shard.lock:
+            delta = shard.deltas.get(brand_name, 0)
+        with self._state_lock:
+            return delta + self._inflight.get(brand_name, 0)
+
+    def pending_all(self) -> Dict[str, int]:
+        """所有品牌尚未写入数据库的增量"""
+        with self._state_lock:
+            result = dict(self._inflight)
+        for shard in self._shards:
+            with shard.lock:
+                for brand_name, delta in shard.deltas.items():
+                    result[brand_name] = result.get(brand_name, 0) + delta
+        return {brand_name: delta for brand_name, delta in result.items() if delta}
+
+    def apply(self, counts: Dict[str, int], brand_names: Iterable[str] = None) -> Dict[str, int]:
+        """把尚未写回的增量叠加到数据库中读出的点赞数上（brand_names为空时叠加全部品牌）"""
+        if brand_names is None:
+            pending = self.pending_all()
+        else:
+            pending = {name: self.pending(name) for name in brand_names}
+        for brand_name, delta in pending.items():
+            if delta:
+                counts[brand_name] = max(counts.get(brand_name, 0) + delta, 0)
+        return counts
+
+    # ------------------------------------------------------------------
+    # 写回
+    # ------------------------------------------------------------------
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"点赞数写回失败，稍后重试: {e}")
+            with self._state_lock:
+                if not any(shard.deltas for shard in self._shards) and not self._inflight:
+                    self._flushing = False
+                    return
+
+    def flush(self) -> int:
+        """把当前所有增量合并后批量写回，返回写入的品牌数；失败时增量保留到下次写回"""
+        with self._flush_lock:
+            with self._state_lock:
+                for shard in self._shards:
+                    with shard.lock:
+                        deltas, shard.deltas = shard.deltas, {}
+                    for brand_name, delta in deltas.items():
+                        self._inflight[brand_name] = self._inflight.get(brand_name, 0) + delta
+                rows = [(brand_name, delta, delta) for brand_name, delta in self._inflight.items() if delta]
+            if not rows:
+                with self._state_lock:
+                    self._inflight.clear()
+                return 0
+
+            try:
+                self._write(rows)
+            except Exception:
+                with self._state_lock:
+                    self._stats['flush_errors'] += 1
+                raise
+
+            with self._state_lock:
+                self._inflight.clear()
+                self._stats['flushes'] += 1
+                self._stats['flushed_rows'] += len(rows)
+
+        # 每次写回只递增一次likes版本（而不是每次点赞），品牌快照随之只刷新点赞数
+        from backend.services.cache_service import cache_service
+        cache_service.bump_version('likes')
+        return len(rows)
+
+    @staticmethod
+    def _write(rows):
+        from backend.utils.db_pool import mysql_pool
+
+        connection = mysql_pool.connect()
+        try:
+            connection.begin()
+            cursor = connection.cursor()
+            cursor.executemany("""
+                INSERT INTO brand_like_stats (brand_name, like_count)
+                VALUES (%s, GREATEST(%s, 0))
+                ON DUPLICATE KEY UPDATE like_count = GREATEST(like_count + %s, 0)
+            """, rows)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def get_stats(self) -> Dict:
+        pending = self.pending_all()
+        with self._state_lock:
+            stats = dict(self._stats)
+        stats.update({'pending_brands': len(pending), 'pending_delta': sum(pending.values())})
+        return stats
+
+
+# 全局点赞计数缓冲
+like_counter = LikeCounter()
+
+
+def _flush_on_exit():
+    try:
+        count = like_counter.flush()
+        if count:
+            print(f"💾 退出前已写回{count}个品牌的点赞数")
+    except Exception as e:
+        print(f"退出前写回点赞数失败: {e}")
+
+
+atexit.register(_flush_on_exit)
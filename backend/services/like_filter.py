@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+点赞状态过滤器
+绝大多数访客没有点过赞，但每次查看布料都要查询brand_likes确认点赞状态。这里在内存中维护：
+- 布隆过滤器：覆盖所有(品牌名, 用户标识)点赞记录，不在过滤器中即“肯定没点赞”，不访问数据库
+- LRU：最近查询过的(品牌名, 用户标识)的确切点赞状态，过滤器命中（可能点赞）时先查这里
+
+用户标识是like_brand_card中的 md5(IP_UA_基础品牌名)，同一访客在每个品牌下的标识不同，
+所以LRU按(品牌名, 用户标识)缓存，而不是按用户缓存点赞集合
+
+启动时后台流式读取brand_likes构建过滤器（构建完成前照常查询数据库）；
+点赞/取消点赞时同步更新；超过MAX_AGE或记录数超过容量时重建，以获取其他进程的点赞并调整大小
+
+注意：过滤器和LRU都只在本进程内同步更新。多进程部署（如gunicorn -w 4）时，
+其他进程写入的点赞在本进程重建前（最多MAX_AGE秒）可能被判为“没点赞”，
+LRU中的状态最多保留RECENT_TTL秒，重建时清空
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+# 布隆过滤器目标误判率
+ERROR_RATE = 0.01
+# 最小容量（记录数）
+MIN_CAPACITY = 10000
+# 流式读取brand_likes时每批的行数
+FETCH_SIZE = 5000
+
+
+class BloomFilter:
+    """布隆过滤器 - 位数组 + 双重哈希"""
+
+    __slots__ = ('capacity', 'size', 'hashes', 'count', '_bits')
+
+    def __init__(self, capacity: int, error_rate: float = ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def estimated_error_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+def _key(brand_name: str, user_hash: str) -> str:
+    return f"{brand_name}\0{user_hash}"
+
+
+class LikeFilter:
+    """点赞状态过滤器 - 布隆过滤器 + 最近查询的LRU"""
+
+    # 超过该时间重建一次，获取其他进程的点赞
+    MAX_AGE = 600
+    # LRU容量和单条状态的有效期（秒），有效期不超过MAX_AGE
+    MAX_RECENT = 10000
+    RECENT_TTL = 60
+
+    def __init__(self):
+        self._bloom: Optional[BloomFilter] = None
+        self._built_at: Optional[float] = None
+        self._recent: 'OrderedDict[Tuple[str, str], Tuple[bool, float]]' = OrderedDict()  # -> (是否点赞, 过期时间)
+        # 重建期间发生的点赞，构建完成后补进新的过滤器
+        self._pending_adds = []
+        self._rebuilding = False
+        self._lock = threading.Lock()
+        self._stats = {'lookups': 0, 'filtered': 0, 'recent_hits': 0, 'db_checks': 0}
+
+    # ------------------------------------------------------------------
+    # 构建
+    # ------------------------------------------------------------------
+    def start_rebuild(self):
+        """后台重建过滤器，已在重建时忽略"""
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+            self._pending_adds = []
+        threading.Thread(target=self._rebuild, name='like-filter', daemon=True).start()
+
+    def _rebuild(self):
+        start = time.time()
+        try:
+            bloom = self._load()
+        except Exception as e:
+            print(f"点赞过滤器构建失败: {e}")
+            with self._lock:
+                self._rebuilding = False
+                self._pending_adds = []
+            return
+
+        with self._lock:
+            for key in self._pending_adds:
+                bloom.add(key)
+            self._pending_adds = []
+            self._bloom = bloom
+            self._built_at = time.time()
+            self._rebuilding = False
+            # 重建后以数据库为准，丢弃可能已被其他进程改变的状态
+            self._recent.clear()
+        print(f"👍 点赞过滤器已构建: {bloom.count}条点赞记录, "
+              f"{bloom.size // 8 // 1024}KB, 耗时{(time.time() - start) * 1000:.1f}ms")
+
+    @staticmethod
+    def _load() -> BloomFilter:
+        """流式读取brand_likes（不把结果集整体读入内存）构建布隆过滤器"""
+        import pymysql
+        from backend.utils.db_pool import mysql_pool
+
+        connection = mysql_pool.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) AS total FROM brand_likes")
+            total = cursor.fetchone()['total']
+            # 预留一倍空间给后续点赞
+            bloom = BloomFilter(max(total * 2, MIN_CAPACITY))
+
+            stream = connection.cursor(pymysql.cursors.SSCursor)
+            try:
+                stream.execute("SELECT brand_name, user_hash FROM brand_likes")
+                while True:
+                    rows = stream.fetchmany(FETCH_SIZE)
+                    if not rows:
+                        break
+                    for brand_name, user_hash in rows:
+                        bloom.add(_key(brand_name, user_hash))
+            finally:
+                stream.close()
+            return bloom
+        finally:
+            connection.close()
+
+    def _check_freshness(self):
+        bloom = self._bloom
+        if bloom is None:
+            return
+        if time.time() - self._built_at >= self.MAX_AGE or bloom.count > bloom.capacity:
+            self.start_rebuild()
+
+    # ------------------------------------------------------------------
+    # 查询与更新
+    # ------------------------------------------------------------------
+    def lookup(self, brand_name: str, user_hash: str) -> Optional[bool]:
+        """不访问数据库能确定的点赞状态；无法确定（需要查询数据库）时返回None"""
+        self._check_freshness()
+        with self._lock:
+            self._stats['lookups'] += 1
+            recent = self._recent.get((brand_name, user_hash))
+            if recent is not None:
+                liked, expires_at = recent
+                if expires_at > time.time():
+                    self._recent.move_to_end((brand_name, user_hash))
+                    self._stats['recent_hits'] += 1
+                    return liked
+                del self._recent[(brand_name, user_hash)]
+            if self._bloom is not None and _key(brand_name, user_hash) not in self._bloom:
+                self._stats['filtered'] += 1
+                return False
+            self._stats['db_checks'] += 1
+            return None
+
+    def lookup_many(self, pairs: Iterable[Tuple[str, str]]) -> Tuple[Dict[Tuple[str, str], bool], list]:
+        """批量查询，返回 (已确定的状态, 需要查询数据库的(品牌名, 用户标识)列表)"""
+        known, unknown = {}, []
+        for pair in pairs:
+            liked = self.lookup(*pair)
+            if liked is None:
+                unknown.append(pair)
+            else:
+                known[pair] = liked
+        return known, unknown
+
+    def remember(self, brand_name: str, user_hash: str, liked: bool):
+        """记录从数据库确认的点赞状态"""
+        with self._lock:
+            self._recent[(brand_name, user_hash)] = (liked, time.time() + self.RECENT_TTL)
+            self._recent.move_to_end((brand_name, user_hash))
+            while len(self._recent) > self.MAX_RECENT:
+                self._recent.popitem(last=False)
+
+    def record(self, brand_name: str, user_hash: str, liked: bool):
+        """点赞/取消点赞后更新（布隆过滤器不支持删除，取消点赞只更新LRU）"""
+        if liked:
+            key = _key(brand_name, user_hash)
+            with self._lock:
+                if self._bloom is not None:
+                    self._bloom.add(key)
+                if self._rebuilding:
+                    self._pending_adds.append(key)
+        self.remember(brand_name, user_hash, liked)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            bloom = self._bloom
+            stats.update({
+                'loaded': bloom is not None,
+                'built_at': self._built_at,
+                'recent': len(self._recent),
+            })
+        if bloom is not None:
+            stats.update({
+                'items': bloom.count,
+                'capacity': bloom.capacity,
+                'bytes': len(bloom._bits),
+                'hashes': bloom.hashes,
+                'estimated_error_rate': round(bloom.estimated_error_rate, 6),
+            })
+        return stats
+
+
+# 全局点赞状态过滤器
+like_filter = LikeFilter()
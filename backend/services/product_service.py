@@ -5,27 +5,39 @@
 """
 
 from backend.models import db, init_models
+from backend.services.cache_service import cache_service
+from backend.services.search_index import search_index
 from datetime import datetime
 from urllib.parse import unquote
 
 # 初始化模型
 Product, Admin, AccessLog = init_models()
 
+class ProductPage:
+    """页码分页结果（属性与Flask-SQLAlchemy的Pagination一致），总数来自缓存计数"""
+    
+    def __init__(self, items, page, per_page, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.pages = (total + per_page - 1) // per_page if per_page else 0
+        self.has_prev = page > 1
+        self.has_next = page < self.pages
+
 class ProductService:
     """产品处理服务类"""
     
     @staticmethod
-    def get_all_products(page=1, per_page=20, search=None, filters=None):
-        """获取所有产品（支持分页和筛选）"""
-        try:
-            if not Product:
-                print("Product模型未初始化")
-                return None
-                
-            query = Product.query
-            
-            # 多字段搜索过滤
-            if search:
+    def _filtered_query(search=None, filters=None):
+        """按搜索词和筛选条件构建产品查询"""
+        query = Product.query
+        
+        # 多字段搜索：在进程内倒排索引中严格匹配（与LIKE '%term%'结果一致），避免多字段全表扫描；
+        # 查询串中没有可预筛选的词项（只有标点、通配符）时仍用LIKE查询
+        if search:
+            product_ids = search_index.search_ids(search, strict=True)
+            if product_ids is None:
                 search_term = f'%{search}%'
                 query = query.filter(
                     db.or_(
@@ -38,24 +50,76 @@ class ProductService:
                         Product.publish_month.like(search_term)
                     )
                 )
+            else:
+                query = query.filter(Product.id.in_(product_ids))
+        
+        # 其他筛选条件
+        if filters:
+            if filters.get('theme'):
+                query = query.filter(Product.theme_series == filters['theme'])
+            if filters.get('year'):
+                query = query.filter(Product.year == filters['year'])
+            if filters.get('material'):
+                query = query.filter(Product.material == filters['material'])
+            if filters.get('state'):
+                query = query.filter(Product.state == filters['state'])
+        
+        return query
+    
+    @staticmethod
+    def count_products(search=None, filters=None):
+        """符合条件的产品总数，按产品数据版本缓存，避免每次翻页都执行COUNT(*)"""
+        filter_key = '|'.join(f"{k}={v}" for k, v in sorted((filters or {}).items()))
+        cache_key = f"products_total:{cache_service.get_version('products')}:{search or ''}:{filter_key}"
+        return cache_service.get_or_set(
+            cache_key,
+            lambda: ProductService._filtered_query(search, filters).order_by(None).count(),
+            ttl=600
+        )
+    
+    @staticmethod
+    def get_all_products(page=1, per_page=20, search=None, filters=None):
+        """获取所有产品（支持分页和筛选），总数来自缓存的计数"""
+        try:
+            if not Product:
+                print("Product模型未初始化")
+                return None
+                
+            page = max(page, 1)
+            query = ProductService._filtered_query(search, filters)
             
-            # 其他筛选条件
-            if filters:
-                if filters.get('theme'):
-                    query = query.filter(Product.theme_series == filters['theme'])
-                if filters.get('year'):
-                    query = query.filter(Product.year == filters['year'])
-                if filters.get('material'):
-                    query = query.filter(Product.material == filters['material'])
-                if filters.get('state'):
-                    query = query.filter(Product.state == filters['state'])
-            
-            # 排序和分页
-            products = query.order_by(Product.updated_at.desc()).paginate(
-                page=page, per_page=per_page, error_out=False
-            )
+            # 排序和分页（使用(updated_at, id)复合索引，不在分页时执行COUNT）
+            items = query.order_by(Product.updated_at.desc(), Product.id.desc()) \
+                .offset((page - 1) * per_page).limit(per_page).all()
+            
+            return ProductPage(items, page, per_page, ProductService.count_products(search, filters))
+            
+        except Exception as e:
+            print(f"获取产品列表失败: {str(e)}")
+            return None
+    
+    @staticmethod
+    def get_products_after(cursor=None, per_page=20, search=None, filters=None):
+        """游标分页：返回排在cursor（上一页最后一个产品的(updated_at, id)）之后的产品
+        
+        Returns:
+            (产品列表, 是否还有下一页)，失败时返回None
+        """
+        try:
+            query = ProductService._filtered_query(search, filters)
             
-            return products
+            if cursor:
+                updated_at, product_id = cursor
+                query = query.filter(
+                    db.or_(
+                        Product.updated_at < updated_at,
+                        db.and_(Product.updated_at == updated_at, Product.id < product_id)
+                    )
+                )
+            
+            # 多取一条判断是否还有下一页
+            products = query.order_by(Product.updated_at.desc(), Product.id.desc()).limit(per_page + 1).all()
+            return products[:per_page], len(products) > per_page
             
         except Exception as e:
             print(f"获取产品列表失败: {str(e)}")
@@ -113,26 +177,16 @@ class ProductService:
                 product = Product.query.filter_by(brand_name=base_brand).first()
             
             if not product:
-                # 第三级：特殊字符匹配（保留您要求的逻辑）
-                clean_brand = decoded_brand_name.split('(')[0] if '(' in decoded_brand_name else decoded_brand_name
-                clean_brand = clean_brand.strip().replace(' ', '').replace('-', '').replace('_', '')
-                print(f"基础匹配失败，尝试特殊字符匹配: {clean_brand}")
-                
-                # 使用有限的模糊查询而不是全表扫描
-                potential_matches = Product.query.filter(
-                    db.or_(
-                        Product.brand_name.like(f'{clean_brand}%'),
-                        Product.brand_name.like(f'%{clean_brand}')
-                    )
-                ).limit(10).all()  # 限制结果数量，避免全表扫描
+                # 第三级：特殊字符匹配，使用共享的n-gram品牌匹配器，不再发起LIKE查询
+                from backend.services.brand_matcher import get_brand_matcher
+                print(f"基础匹配失败，尝试模糊匹配: {decoded_brand_name}")
                 
-                for p in potential_matches:
-                    clean_p_name = p.brand_name.split('(')[0] if '(' in p.brand_name else p.brand_name
-                    clean_p_name = clean_p_name.replace(' ', '').replace('-', '').replace('_', '')
-                    if clean_brand == clean_p_name or clean_brand in clean_p_name or clean_p_name in clean_brand:
-                        product = p
-                        print(f"找到匹配品牌: {p.brand_name} (通过特殊字符匹配)")
-                        break
+                candidates = get_brand_matcher().match(decoded_brand_name, source='products', limit=1, containment_only=True)
+                if candidates:
+                    matched_name, score = candidates[0]
+                    product = Product.query.filter_by(brand_name=matched_name).first()
+                    if product:
+                        print(f"找到匹配品牌: {product.brand_name} (模糊匹配, 评分{score:.2f})")
             
             if not product:
                 print(f"所有匹配方式都失败，未找到品牌: {decoded_brand_name}")
@@ -212,6 +266,8 @@ class ProductService:
             
             db.session.add(product)
             db.session.commit()
+            cache_service.bump_version('products')
+            search_index.upsert(product.to_dict())
             
             return product, None
             
@@ -256,6 +312,8 @@ class ProductService:
             product.updated_at = datetime.utcnow()
             
             db.session.commit()
+            cache_service.bump_version('products')
+            search_index.upsert(product.to_dict())
             
             return product, None
             
@@ -275,6 +333,8 @@ class ProductService:
             
             db.session.delete(product)
             db.session.commit()
+            cache_service.bump_version('products')
+            search_index.remove(product_id)
             
             return True, None
             
@@ -370,6 +430,7 @@ class ProductService:
                 {Product.is_featured: is_featured}, synchronize_session=False
             )
             db.session.commit()
+            cache_service.bump_version('products')
             return True, None
             
         except Exception as e:
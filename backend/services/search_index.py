@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+产品全文检索
+进程内倒排索引，替代多字段 LIKE '%term%' 全表扫描：
+- 分词：中文按单字+二元组（bigram），字母数字按词，统一小写
+- 排序：BM25，按字段加权（品牌名 > 标题 > 材质/主题 > 灵感来源）
+- 更新：ProductService写入后增量更新单个产品；其他进程的修改通过检查产品表的
+  (记录数, 最大updated_at)发现，最多CHECK_INTERVAL秒后全量重建
+- 过滤：产品列表的search参数使用严格模式，结果与原先多字段 LIKE '%search%' 一致（包括%和_通配符）；
+  字母数字词项通过1~3字符的子串索引找到包含它的词，不遍历整个词表
+"""
+
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+# 被索引的字段及权重
+FIELD_WEIGHTS = {
+    'brand_name': 3.0,
+    'title': 2.0,
+    'material': 1.5,
+    'theme_series': 1.5,
+    'print_size': 1.0,
+    'inspiration_origin': 1.0,
+    'year': 1.0,
+    'publish_month': 1.0,
+}
+
+# 严格过滤时检查的字段（与原先产品列表 LIKE '%search%' 过滤的字段一致）
+FILTER_FIELDS = ('brand_name', 'title', 'material', 'theme_series', 'inspiration_origin', 'year', 'publish_month')
+
+# BM25参数
+K1 = 1.2
+B = 0.75
+
+_CJK_RUN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+_WORD = re.compile(r'[0-9a-z]+')
+# LIKE模式中的转义字符和通配符
+_LIKE_TOKEN = re.compile(r'\\.|[%_]|[^\\%_]+|\\')
+# 子串索引的最大片段长度
+GRAM_SIZE = 3
+
+
+def tokenize(text, for_query: bool = False) -> List[str]:
+    """中文连续片段拆为单字和二元组，字母数字按词
+
+    查询时只使用二元组（单字片段除外），要求所有词项命中即近似子串匹配
+    """
+    if text is None:
+        return []
+    text = str(text).lower()
+    tokens = []
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1 or not for_query:
+            tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(_WORD.findall(text))
+    return tokens
+
+
+def like_to_regex(pattern: str):
+    """把 LIKE '%pattern%' 转为等价的正则（%匹配任意串，_匹配单个字符，\\转义）"""
+    parts = []
+    for piece in _LIKE_TOKEN.findall(pattern):
+        if piece == '%':
+            parts.append('.*')
+        elif piece == '_':
+            parts.append('.')
+        elif piece.startswith('\\') and len(piece) == 2:
+            parts.append(re.escape(piece[1]))
+        else:
+            parts.append(re.escape(piece))
+    return re.compile(''.join(parts), re.DOTALL)
+
+
+def _grams(term: str):
+    """词的所有长度1~GRAM_SIZE的子串"""
+    return {term[i:i + n] for n in range(1, GRAM_SIZE + 1) for i in range(len(term) - n + 1)}
+
+
+class SearchIndex:
+    """BM25倒排索引 - 词项 -> {产品ID: 加权词频}"""
+
+    # 超过该时间全量重建一次
+    MAX_AGE = 600
+    # 检查产品表是否被其他进程修改的间隔（秒）
+    CHECK_INTERVAL = 5
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._word_grams: Dict[str, Set[str]] = {}   # 字母数字词的子串片段 -> 包含该片段的词
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_length: Dict[int, float] = {}
+        self._documents: Dict[int, Dict] = {}
+        self._total_length = 0.0
+        self._built_at: Optional[float] = None
+        self._checked_at = 0.0
+        self._marker = None
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # 构建与增量更新
+    # ------------------------------------------------------------------
+    def rebuild(self, documents: List[Dict]):
+        """用产品字典（Product.to_dict()）全量重建"""
+        start = time.time()
+        with self._lock:
+            self._postings.clear()
+            self._word_grams.clear()
+            self._doc_terms.clear()
+            self._doc_length.clear()
+            self._documents.clear()
+            self._total_length = 0.0
+            for document in documents:
+                self._add(document)
+            self._built_at = time.time()
+        print(f"🔎 搜索索引已构建: {len(documents)}个产品, {len(self._postings)}个词项, "
+              f"耗时{(time.time() - start) * 1000:.1f}ms")
+
+    def upsert(self, document: Dict):
+        """新增或更新单个产品"""
+        with self._lock:
+            if self._built_at is None:
+                return  # 尚未构建，首次搜索时会全量加载
+            self._remove(document['id'])
+            self._add(document)
+
+    def remove(self, product_id: int):
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(product_id)
+
+    def _add(self, document: Dict):
+        product_id = document['id']
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token, count in Counter(tokenize(document.get(field))).items():
+                terms[token] = terms.get(token, 0.0) + count * weight
+
+        for token, tf in terms.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._index_word(token)
+            postings[product_id] = tf
+        length = sum(terms.values())
+        self._doc_terms[product_id] = terms
+        self._doc_length[product_id] = length
+        self._documents[product_id] = document
+        self._total_length += length
+
+    def _remove(self, product_id: int):
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[token]
+                    self._unindex_word(token)
+        self._total_length -= self._doc_length.pop(product_id, 0.0)
+        self._documents.pop(product_id, None)
+
+    def _index_word(self, term: str):
+        if _WORD.fullmatch(term):
+            for gram in _grams(term):
+                self._word_grams.setdefault(gram, set()).add(term)
+
+    def _unindex_word(self, term: str):
+        if _WORD.fullmatch(term):
+            for gram in _grams(term):
+                terms = self._word_grams.get(gram)
+                if terms is not None:
+                    terms.discard(term)
+                    if not terms:
+                        del self._word_grams[gram]
+
+    def _words_containing(self, token: str) -> Set[str]:
+        """包含token的字母数字词：短token直接查子串索引，长token取各片段对应词集合的交集再确认"""
+        if len(token) <= GRAM_SIZE:
+            return self._word_grams.get(token, set())
+        terms = None
+        for i in range(len(token) - GRAM_SIZE + 1):
+            found = self._word_grams.get(token[i:i + GRAM_SIZE], set())
+            terms = found if terms is None else terms & found
+            if not terms:
+                return set()
+        return {term for term in terms if token in term}
+
+    def _ensure_loaded(self):
+        now = time.time()
+        if self._built_at is not None and now - self._checked_at < self.CHECK_INTERVAL \
+                and now - self._built_at < self.MAX_AGE:
+            return
+        from backend.models.product import Product
+
+        marker = self._table_marker()
+        self._checked_at = now
+        if self._built_at is not None and marker == self._marker and now - self._built_at < self.MAX_AGE:
+            return
+        self.rebuild([product.to_dict() for product in Product.query.all()])
+        self._marker = marker
+
+    @staticmethod
+    def _table_marker():
+        """产品表的(记录数, 最大updated_at)，其他进程新增/修改/删除产品后会变化"""
+        from backend.models import db
+        from backend.models.product import Product
+        return tuple(db.session.query(db.func.count(Product.id), db.func.max(Product.updated_at)).one())
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Tuple[Dict, float]]]:
+        """按BM25得分排序，返回(命中总数, [(产品字典, 得分)])
+
+        优先返回包含全部查询词项的产品；没有时退回任一词项命中
+        """
+        with self._lock:
+            self._ensure_loaded()
+            scores = self._score(tokenize(query, for_query=True))
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+            return len(ranked), [(self._documents[pid], score) for pid, score in ranked[offset:offset + limit]]
+
+    def search_ids(self, query: str, strict: bool = False) -> Optional[List[int]]:
+        """匹配的产品ID
+
+        默认按相关度排序，没有产品包含全部词项时退回任一词项命中（用于搜索排序）；
+        strict=True时只返回FILTER_FIELDS中某个字段匹配 LIKE '%query%' 的产品（用于列表过滤，
+        字母数字支持部分匹配，如'202'匹配2024、'cot'匹配cotton，%和_按通配符处理）；
+        查询串中没有可用于预筛选的词项（如只有标点或通配符）时返回None，由调用方改用LIKE查询
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if strict:
+                return self._filter_ids(query)
+            scores = self._score(tokenize(query, for_query=True))
+            return sorted(scores, key=lambda pid: (-scores[pid], -pid))
+
+    def _filter_ids(self, query: str) -> Optional[List[int]]:
+        needle = str(query).lower()
+        candidates = None
+        # 通配符两侧的片段分别分词，词项不跨越通配符
+        for token in dict.fromkeys(tokenize(needle, for_query=True)):
+            if _CJK_RUN.fullmatch(token):
+                ids = set(self._postings.get(token, ()))
+            else:
+                ids = set()
+                for term in self._words_containing(token):
+                    ids.update(self._postings[term])
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        if candidates is None:
+            return None
+
+        # 倒排索引只做预筛选，最终按原始字段做 LIKE '%query%' 判断
+        pattern = like_to_regex(needle)
+        return sorted(
+            product_id for product_id in candidates
+            if any(pattern.search(str(value).lower())
+                   for value in (self._documents[product_id].get(field) for field in FILTER_FIELDS)
+                   if value is not None)
+        )
+
+    def _score(self, tokens: List[str]) -> Dict[int, float]:
+        tokens = list(dict.fromkeys(tokens))
+        if not tokens or not self._doc_length:
+            return {}
+
+        postings = [self._postings.get(token, {}) for token in tokens]
+        candidates = set.intersection(*(set(p) for p in postings)) if all(postings) else set()
+        if not candidates:
+            candidates = set().union(*postings)
+
+        doc_count = len(self._doc_length)
+        avg_length = self._total_length / doc_count or 1.0
+        scores: Dict[int, float] = {}
+        for posting in postings:
+            if not posting:
+                continue
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for product_id, tf in posting.items():
+                if product_id not in candidates:
+                    continue
+                norm = K1 * (1 - B + B * self._doc_length[product_id] / avg_length)
+                scores[product_id] = scores.get(product_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'documents': len(self._documents),
+                'terms': len(self._postings),
+                'built_at': self._built_at
+            }
+
+
+# 全局产品搜索索引
+search_index = SearchIndex()
@@ -175,6 +175,36 @@ def smart_cache(f):
         return response
     return decorated_function
 
+def versioned_etag(*namespaces, tag_source=None):
+    """数据版本ETag装饰器 - 按数据版本号+请求路径生成ETag，版本未变化时直接返回304，不执行视图函数
+    
+    tag_source: 可选，返回版本标识的函数（例如视图所读快照的版本），提供时忽略namespaces
+
+    注意：数据版本号是进程内计数器，只反映本进程的写入。多进程部署时其他进程的修改
+    不会改变本进程的ETag，直到本进程的数据重建（品牌快照见BRAND_CATALOG_MAX_AGE）
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            from backend.services.cache_service import cache_service
+            
+            version_tag = tag_source() if tag_source else cache_service.version_tag(*namespaces)
+            etag = hashlib.md5(f"{version_tag}:{request.full_path}".encode()).hexdigest()
+            
+            # 检查客户端缓存
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'public, max-age=60, must-revalidate'
+            return response
+        return decorated_function
+    return decorator
+
 class VersionManager:
     """版本管理器 - 为静态资源添加版本号"""
     
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应压缩
+按Accept-Encoding协商brotli（安装了brotli时）或gzip：
+- 预压缩：品牌快照的JSON响应体和静态文本资源（HTML/CSS/JS）的压缩结果与原始字节缓存在一起，
+  每个版本每种编码只压缩一次
+- 其余文本类动态响应在after_request中以较低的压缩级别即时压缩
+压缩后的响应ETag改为弱ETag（与nginx gzip一致），条件请求仍按弱比较命中304
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli是可选依赖
+    brotli = None
+
+# 按优先级排列（质量相同时优先brotli）
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# 预压缩（每个版本只做一次）使用较高级别，即时压缩使用较低级别
+PRECOMPRESS_LEVELS = {'br': 9, 'gzip': 9}
+DYNAMIC_LEVELS = {'br': 4, 'gzip': 6}
+
+# 小于该大小的响应不压缩
+MIN_SIZE = 1024
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    # mtime=0 保证相同内容的压缩结果一致
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def negotiate_encoding() -> Optional[str]:
+    """根据Accept-Encoding选择编码，不接受压缩时返回None"""
+    accept = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        quality = accept[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+class CompressedBody:
+    """原始字节 + 按需生成并缓存的各编码压缩结果"""
+
+    __slots__ = ('identity', '_variants', '_lock')
+
+    def __init__(self, identity: bytes):
+        self.identity = identity
+        self._variants: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.identity
+        data = self._variants.get(encoding)
+        if data is None:
+            # 同一编码只压缩一次，并发请求等待第一次压缩完成
+            with self._lock:
+                data = self._variants.get(encoding)
+                if data is None:
+                    data = self._variants[encoding] = compress(
+                        self.identity, encoding, PRECOMPRESS_LEVELS[encoding])
+        return data
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.identity) + sum(len(v) for v in self._variants.values())
+
+
+def set_body(response, body: CompressedBody):
+    """按协商结果把预压缩的响应体写入response"""
+    encoding = negotiate_encoding() if len(body.identity) >= MIN_SIZE else None
+    _apply(response, body.get(encoding), encoding)
+    return response
+
+
+def _apply(response, data: bytes, encoding: Optional[str]):
+    response.vary.add('Accept-Encoding')
+    response.set_data(data)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+        # Range针对未压缩的表示，压缩后不再声明
+        response.headers.pop('Accept-Ranges', None)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+
+class StaticCompressionCache:
+    """静态文件压缩缓存 - 按(路径, mtime, size)寻址，超过容量时按LRU淘汰"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, Tuple[Tuple[int, int], CompressedBody]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[CompressedBody]:
+        from backend.utils.file_offload import file_validators
+
+        validators = file_validators.lookup(path)
+        if validators is None:
+            return None
+        stats = (validators.mtime_ns, validators.size)
+
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached and cached[0] == stats:
+                self._entries.move_to_end(path)
+                return cached[1]
+
+        try:
+            with open(path, 'rb') as f:
+                body = CompressedBody(f.read())
+        except OSError:
+            return None
+        with self._lock:
+            self._entries[path] = (stats, body)
+            self._evict()
+        return body
+
+    def _evict(self):
+        total = sum(body.nbytes for _, body in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, (_, body) = self._entries.popitem(last=False)
+            total -= body.nbytes
+
+
+# 全局静态文件压缩缓存
+static_compression_cache = StaticCompressionCache()
+
+
+def _static_file_path(app) -> Optional[str]:
+    """Flask静态文件视图对应的文件路径"""
+    if request.endpoint != 'static' or not app.static_folder:
+        return None
+    from werkzeug.security import safe_join
+    return safe_join(app.static_folder, request.view_args.get('filename', ''))
+
+
+def init_compression(app, resolve_file: Callable[[], Optional[str]] = None):
+    """注册响应压缩
+
+    resolve_file: 返回当前请求对应的静态文件路径（无则返回None），这些文件使用预压缩缓存；
+    默认只识别Flask自带的static视图
+    """
+    resolve_file = resolve_file or (lambda: _static_file_path(app))
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or 'Content-Encoding' in response.headers
+                or request.method == 'HEAD' or not is_compressible(response.mimetype)):
+            return response
+
+        if response.direct_passthrough or response.is_streamed:
+            # 文件响应：只处理能对应到静态文件的请求
+            path = resolve_file()
+            body = static_compression_cache.get(path) if path else None
+            if body is None:
+                return response
+            response.close()
+            response.direct_passthrough = False
+            return set_body(response, body)
+
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            response.vary.add('Accept-Encoding')
+            return response
+        encoding = negotiate_encoding()
+        if encoding:
+            _apply(response, compress(data, encoding, DYNAMIC_LEVELS[encoding]), encoding)
+        else:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    print(f"🗜️ 响应压缩已启用: {', '.join(ENCODINGS)}")
+    return app
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分页游标
+游标是最后一条记录排序键的不透明编码（URL安全的base64 JSON），下一页从该位置之后继续，
+不依赖OFFSET，深翻页和首页开销相同
+"""
+
+import base64
+import json
+from typing import Tuple
+
+
+def encode_cursor(*values) -> str:
+    """把排序键编码为游标"""
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str, types: Tuple[type, ...]) -> Tuple:
+    """解码游标并校验每个排序键的类型，格式不正确时抛出ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError, TypeError):
+        raise ValueError('无效的分页游标')
+    if not isinstance(values, list) or len(values) != len(types) \
+            or not all(type(value) is expected for value, expected in zip(values, types)):
+        raise ValueError('无效的分页游标')
+    return tuple(values)
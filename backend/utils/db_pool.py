@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MySQL连接池
+点赞等直接执行SQL的模块共用一个有上限的pymysql连接池，避免每次调用都重新建立TCP连接和MySQL握手：
+- 连接取出时先ping检查，断开的连接自动丢弃并重建（与SQLAlchemy的pool_pre_ping一致）
+- 超过DB_POOL_RECYCLE秒的连接回收重建，避免被MySQL的wait_timeout关闭
+- 记录取出次数、等待时间、新建/失效连接数等指标，通过 /api/db/pool/stats 查看（仅限本机访问）
+
+池中连接的close()只是归还连接，调用方的用法与直接使用pymysql连接相同
+"""
+
+import os
+import threading
+import time
+from typing import Dict
+
+import pymysql
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+def _connect():
+    """新建一个pymysql连接（与config.py使用相同的数据库配置）"""
+    return pymysql.connect(
+        host=os.environ.get('DB_HOST', '47.118.250.53'),
+        port=int(os.environ.get('DB_PORT', 3306)),
+        user=os.environ.get('DB_USER', 'nanyi'),
+        password=os.environ.get('DB_PASSWORD', 'admin123456!'),
+        database=os.environ.get('DB_NAME', 'nanyiqiutang'),
+        charset='utf8mb4',
+        autocommit=True,
+        connect_timeout=15,
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+class MySQLConnectionPool:
+    """pymysql连接池 - 首次使用时创建，取出的连接close()后归还"""
+
+    def __init__(self, pool_size: int = 5, max_overflow: int = 10,
+                 timeout: float = 20, recycle: int = 3600):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self._pool = None
+        self._lock = threading.Lock()
+        self._metrics = {
+            'checkouts': 0,        # 取出次数
+            'checkout_errors': 0,  # 取出失败（连接失败、等待超时）
+            'connects': 0,         # 新建的物理连接
+            'invalidated': 0,      # 健康检查失败或出错后丢弃的连接
+            'wait_ms_total': 0.0,
+            'wait_ms_max': 0.0,
+        }
+
+    def _get_pool(self) -> QueuePool:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    pool = QueuePool(_connect, pool_size=self.pool_size, max_overflow=self.max_overflow,
+                                     timeout=self.timeout, recycle=self.recycle)
+                    event.listen(pool, 'connect', self._on_connect)
+                    event.listen(pool, 'checkout', self._on_checkout)
+                    event.listen(pool, 'invalidate', self._on_invalidate)
+                    self._pool = pool
+        return self._pool
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._metrics['connects'] += 1
+
+    @staticmethod
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        """取出前ping检查，失败时让连接池换一个新连接"""
+        try:
+            dbapi_connection.ping(reconnect=False)
+        except pymysql.Error:
+            raise exc.DisconnectionError()
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self._metrics['invalidated'] += 1
+
+    def connect(self):
+        """取出一个连接（DictCursor、autocommit），用完后调用close()归还"""
+        start = time.perf_counter()
+        try:
+            connection = self._get_pool().connect()
+        except Exception:
+            with self._lock:
+                self._metrics['checkout_errors'] += 1
+            raise
+        wait_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._metrics['checkouts'] += 1
+            self._metrics['wait_ms_total'] += wait_ms
+            self._metrics['wait_ms_max'] = max(self._metrics['wait_ms_max'], wait_ms)
+        return connection
+
+    def dispose(self):
+        """关闭池中所有空闲连接"""
+        if self._pool is not None:
+            self._pool.dispose()
+
+    def stats(self) -> Dict:
+        """连接池状态和取出指标"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        checkouts = metrics['checkouts']
+        metrics['wait_ms_avg'] = round(metrics['wait_ms_total'] / checkouts, 3) if checkouts else 0.0
+        metrics['wait_ms_total'] = round(metrics['wait_ms_total'], 3)
+        metrics['wait_ms_max'] = round(metrics['wait_ms_max'], 3)
+        # 每个新建连接本来都是一次握手，复用率 = 1 - 新建连接数 / 取出次数
+        metrics['reuse_ratio'] = round(1 - metrics['connects'] / checkouts, 4) if checkouts else 0.0
+
+        pool = self._pool
+        metrics.update({
+            'pool_size': self.pool_size,
+            'max_overflow': self.max_overflow,
+            'checked_out': pool.checkedout() if pool else 0,
+            'idle': pool.checkedin() if pool else 0,
+            'overflow': max(pool.overflow(), 0) if pool else 0,
+        })
+        return metrics
+
+
+# 全局MySQL连接池
+mysql_pool = MySQLConnectionPool(
+    pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+    max_overflow=int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+    timeout=float(os.environ.get('DB_POOL_TIMEOUT', 20)),
+    recycle=int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件发送工具
+- 条件请求：强ETag/Last-Modified由(mtime, size)计算并缓存在内存，命中If-None-Match/If-Modified-Since时
+  在任何文件I/O之前返回304
+- 卸载：Flask只负责鉴权和解析路径，通过X-Accel-Redirect（nginx）或X-Sendfile头交给反向代理零拷贝发送文件；
+  只有代理在请求中声明 X-Sendfile-Type 时才卸载
+- 直接发送时支持RFC 7233单段和多段（multipart/byteranges）Range请求
+"""
+
+import mimetypes
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from flask import current_app, request
+from werkzeug.http import is_resource_modified, parse_etags, parse_date
+
+# 卸载模式 -> 响应头
+OFFLOAD_HEADERS = {
+    'nginx': 'X-Accel-Redirect',
+    'sendfile': 'X-Sendfile',
+}
+
+# 多段Range请求的段数上限，超过时按完整文件返回
+MAX_RANGES = 16
+READ_CHUNK_SIZE = 64 * 1024
+
+Validators = namedtuple('Validators', ['etag', 'last_modified', 'mtime_ns', 'size'])
+
+
+class FileValidatorCache:
+    """文件校验值缓存 - path -> (检查时间, Validators或None)
+
+    每个文件最多每RECHECK_INTERVAL秒stat一次（包括文件不存在的结果），校验值始终以磁盘为准。
+    调用方提供的(mtime_ns, size)（例如图片索引）只作为提示：与缓存一致时沿用缓存，
+    不一致时立即重新stat。轮询模式下原地覆盖文件不会改变目录mtime，索引中的值可能过期，
+    不能直接用来计算Content-Length和ETag
+    """
+
+    RECHECK_INTERVAL = 5
+    MAX_ENTRIES = 8192
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, Optional[Validators]]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, path: str, stats: Tuple[int, int] = None) -> Optional[Validators]:
+        now = time.monotonic()
+        cached = self._entries.get(path)
+
+        if cached and now - cached[0] < self.RECHECK_INTERVAL:
+            validators = cached[1]
+            if stats is None or (validators is not None and (validators.mtime_ns, validators.size) == stats):
+                return validators
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._store(path, now, None)
+            return None
+        stats = (stat.st_mtime_ns, stat.st_size)
+
+        if cached and cached[1] and (cached[1].mtime_ns, cached[1].size) == stats:
+            validators = cached[1]
+        else:
+            mtime_ns, size = stats
+            validators = Validators(
+                etag=f"{mtime_ns:x}-{size:x}",
+                last_modified=datetime.fromtimestamp(mtime_ns // 1_000_000_000, tz=timezone.utc),
+                mtime_ns=mtime_ns,
+                size=size
+            )
+        self._store(path, now, validators)
+        return validators
+
+    def _store(self, path: str, checked_at: float, validators: Optional[Validators]):
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES and path not in self._entries:
+                self._entries.clear()
+            self._entries[path] = (checked_at, validators)
+
+
+# 全局校验值缓存
+file_validators = FileValidatorCache()
+
+
+def get_offload_mode():
+    """根据配置和代理声明的X-Sendfile-Type确定当前请求的卸载模式，不卸载时返回None"""
+    mode = current_app.config.get('IMAGE_OFFLOAD_MODE', 'none')
+    proxy_type = request.headers.get('X-Sendfile-Type')
+    if not proxy_type:
+        return None
+
+    if mode == 'auto':
+        for candidate, header in OFFLOAD_HEADERS.items():
+            if header.lower() == proxy_type.lower():
+                return candidate
+        return None
+
+    header = OFFLOAD_HEADERS.get(mode)
+    if header and header.lower() == proxy_type.lower():
+        return mode
+    return None
+
+
+def send_file_offloaded(path: str, root: str, internal_prefix: str, mimetype: str = None,
+                        as_attachment: bool = False, download_name: str = None, max_age: int = None,
+                        stats: Tuple[int, int] = None):
+    """发送root目录下的文件：未修改时返回304，可卸载时只返回响应头，否则直接发送（支持Range）
+
+    Args:
+        path: 文件绝对路径（调用方已完成路径校验）
+        root: 文件所在的根目录，对应nginx internal location的alias
+        internal_prefix: nginx internal location前缀，例如 /protected-images/
+        stats: 已知的(mtime_ns, size)，与缓存的校验值一致时在RECHECK_INTERVAL内不再stat文件
+    """
+    validators = file_validators.lookup(path, stats)
+    if validators is None:
+        return current_app.response_class(status=404)
+
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    response = current_app.response_class(mimetype=mimetype)
+    response.set_etag(validators.etag)
+    response.last_modified = validators.last_modified
+    if as_attachment:
+        filename = download_name or os.path.basename(path)
+        response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+    if max_age is not None:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+
+    # 条件请求：校验值来自内存，不打开文件
+    if not is_resource_modified(request.environ, etag=validators.etag,
+                                last_modified=validators.last_modified, ignore_if_range=True):
+        response.status_code = 304
+        return response
+
+    mode = get_offload_mode()
+    if mode == 'nginx':
+        relative_path = os.path.relpath(path, root).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = internal_prefix.rstrip('/') + '/' + quote(relative_path)
+        return response
+    if mode == 'sendfile':
+        # 响应头只能是latin-1，按字节透传UTF-8路径
+        response.headers['X-Sendfile'] = os.fsencode(path).decode('latin-1')
+        return response
+
+    return _send_with_ranges(response, path, validators)
+
+
+def _send_with_ranges(response, path: str, validators: Validators):
+    """直接发送文件内容，处理Range/If-Range"""
+    size = validators.size
+    response.accept_ranges = 'bytes'
+    ranges = _requested_ranges(validators)
+
+    if ranges is None:
+        response.content_length = size
+        response.response = _read_file(path, [(0, size)])
+        response.direct_passthrough = True
+        return response
+
+    if not ranges:
+        response.status_code = 416
+        response.headers['Content-Range'] = f"bytes */{size}"
+        response.content_length = 0
+        return response
+
+    response.status_code = 206
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{size}"
+        response.content_length = stop - start
+        response.response = _read_file(path, ranges)
+    else:
+        boundary = uuid.uuid4().hex
+        part_type = response.mimetype
+        headers = [
+            (f"--{boundary}\r\nContent-Type: {part_type}\r\n"
+             f"Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n").encode('latin-1')
+            for start, stop in ranges
+        ]
+        closing = f"--{boundary}--\r\n".encode('latin-1')
+        response.content_length = (
+            sum(len(h) + (stop - start) + 2 for h, (start, stop) in zip(headers, ranges)) + len(closing)
+        )
+        response.headers['Content-Type'] = f"multipart/byteranges; boundary={boundary}"
+        response.response = _read_file(path, ranges, headers, closing)
+    response.direct_passthrough = True
+    return response
+
+
+def _requested_ranges(validators: Validators) -> Optional[List[Tuple[int, int]]]:
+    """解析Range头，返回[(start, stop)]；不需要按Range处理时返回None，无法满足时返回[]"""
+    header = request.headers.get('Range')
+    if not header or request.method not in ('GET', 'HEAD'):
+        return None
+
+    # If-Range不匹配时忽略Range，返回完整文件
+    if_range = request.headers.get('If-Range')
+    if if_range:
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            etags = parse_etags(if_range)
+            if not etags.contains(validators.etag):
+                return None
+        else:
+            date = parse_date(if_range)
+            if date is None or int(date.timestamp()) != int(validators.last_modified.timestamp()):
+                return None
+
+    parsed = request.range
+    if parsed is None or parsed.units != 'bytes':
+        # 无法解析的Range按RFC忽略
+        return None
+    if len(parsed.ranges) > MAX_RANGES:
+        return None
+
+    size = validators.size
+    ranges = []
+    for begin, end in parsed.ranges:
+        if begin < 0:
+            start, stop = max(size + begin, 0), size
+        else:
+            start, stop = begin, min(end if end is not None else size, size)
+        if start < stop:
+            ranges.append((start, stop))
+    return _coalesce(ranges)
+
+
+def _coalesce(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """合并重叠或相邻的区间，避免重复发送同一段数据"""
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def _read_file(path: str, ranges: List[Tuple[int, int]], part_headers: List[bytes] = None,
+               closing: bytes = None):
+    """按区间读取文件内容的生成器，多段时在每段前输出分段头"""
+    with open(path, 'rb') as f:
+        for index, (start, stop) in enumerate(ranges):
+            if part_headers:
+                yield part_headers[index]
+            f.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                chunk = f.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+            if part_headers:
+                yield b"\r\n"
+        if closing:
+            yield closing
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON序列化
+安装了orjson时用orjson编码API响应（直接输出UTF-8字节，不经过str），否则退回标准库json。
+非调试模式输出紧凑格式；按JSON_AS_ASCII决定是否转义中文品牌名；datetime按ISO 8601输出
+
+对比标准库和orjson的编码耗时见 scripts/benchmark_json.py
+"""
+
+import dataclasses
+import decimal
+import uuid
+from collections.abc import Mapping
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson是可选依赖
+    orjson = None
+
+
+def _default(o):
+    """orjson/json原生不支持的类型"""
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if isinstance(o, Mapping):
+        # 例如品牌快照中的MappingProxyType
+        return dict(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON提供者 - 优先使用orjson，接口与默认提供者一致"""
+
+    default = staticmethod(_default)
+    # 保持字段定义顺序，不额外排序
+    sort_keys = False
+
+    def __init__(self, app, use_orjson: bool = True):
+        super().__init__(app)
+        self.use_orjson = use_orjson and orjson is not None
+        self.ensure_ascii = app.config.get('JSON_AS_ASCII', False)
+        # 只有配置要求且处于调试模式时才缩进输出
+        self.compact = None if app.config.get('JSONIFY_PRETTYPRINT_REGULAR') else True
+
+    @property
+    def backend(self) -> str:
+        return 'orjson' if self.use_orjson else 'json'
+
+    def _orjson_option(self, pretty: bool) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dump_bytes(self, obj, pretty: bool = False) -> bytes:
+        """序列化为UTF-8字节"""
+        # orjson总是输出UTF-8，要求ASCII转义时交给标准库
+        if self.use_orjson and not self.ensure_ascii:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_option(pretty))
+        kwargs = {'indent': 2} if pretty else {'separators': (',', ':')}
+        return super().dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj, **kwargs) -> str:
+        # 指定了json.dumps参数（如indent、cls）时按标准库语义处理
+        if kwargs or not self.use_orjson or self.ensure_ascii:
+            return super().dumps(obj, **kwargs)
+        return self.dump_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or not self.use_orjson:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dump_bytes(obj, pretty) + b"\n", mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """按JSON_PROVIDER配置（auto/orjson/json）注册JSON提供者"""
+    choice = (app.config.get('JSON_PROVIDER') or 'auto').lower()
+    if choice == 'orjson' and orjson is None:
+        print("⚠️ 未安装orjson，JSON编码使用标准库json")
+    app.json = FastJSONProvider(app, use_orjson=choice != 'json')
+    print(f"🧾 JSON编码: {app.json.backend}")
+    return app.json
+
@@ -85,10 +85,64 @@ class NanyiAPI {
     }
 
     /**
-     * 获取所有图片信息
+     * 获取品牌列表
+     * @param {Object} options - {page, per_page, cursor, load_all, facets, filters, fields, images, normalized}
+     *   fields为字段投影（如'name,year,images.thumbnail'），images为 cover|none|all
+     *   filters为分面筛选 {year: [...], material: [...], theme_series: [...], print_size: [...]}，
+     *   由服务端求交并在响应的facets中返回当前条件下各选项的品牌数量
+     *   normalized为true时请求规范化格式（v=2，图片只传输一次），返回前还原为普通格式
      */
-    async getImages() {
-        return this.request('/images');
+    async getImages(options = {}) {
+        const params = new URLSearchParams();
+        ['page', 'per_page', 'cursor', 'fields', 'images'].forEach(key => {
+            if (options[key]) {
+                params.set(key, options[key]);
+            }
+        });
+        if (options.load_all) {
+            params.set('load_all', 'true');
+        }
+        if (options.facets) {
+            params.set('facets', 'true');
+        }
+        if (options.normalized) {
+            params.set('v', '2');
+        }
+        Object.entries(options.filters || {}).forEach(([facet, values]) => {
+            [].concat(values || []).forEach(value => params.append(facet, value));
+        });
+        const query = params.toString() ? `?${params.toString()}` : '';
+        const response = await this.request(`/images${query}`);
+        return options.normalized ? this.rehydrateListing(response) : response;
+    }
+
+    /**
+     * 把规范化格式（v=2）的品牌列表还原为普通格式：
+     * 图片表的每一行还原为图片对象（字符串表下标还原为字符串），品牌中的图片ID替换为同一个图片对象
+     */
+    rehydrateListing(response) {
+        if (!response || response.version !== 2) {
+            return response;
+        }
+        const fields = response.image_fields || [];
+        const interned = new Set(response.interned_fields || []);
+        const strings = response.strings || [];
+
+        const images = (response.images || []).map(row => {
+            const image = {};
+            fields.forEach((field, index) => {
+                const value = row[index];
+                image[field] = (interned.has(field) && value !== null) ? strings[value] : value;
+            });
+            return image;
+        });
+
+        const brands = (response.brands || []).map(brand => (
+            Array.isArray(brand.images) ? { ...brand, images: brand.images.map(id => images[id]) } : brand
+        ));
+
+        const { strings: _s, interned_fields: _i, image_fields: _f, version: _v, ...rest } = response;
+        return { ...rest, images, brands };
     }
 
     /**
@@ -108,18 +162,27 @@ class NanyiAPI {
 
     /**
      * 获取图片查看URL
+     * @param {Object} options - 可选缩放参数 {w, h, q, fmt}，由后端按需缩放并缓存
      */
-    getImageViewURL(relativePath) {
+    getImageViewURL(relativePath, options = {}) {
         // 处理中文路径编码
         const encodedPath = relativePath.split('/').map(part => encodeURIComponent(part)).join('/');
         
+        const params = new URLSearchParams();
+        ['w', 'h', 'q', 'fmt'].forEach(key => {
+            if (options[key]) {
+                params.set(key, options[key]);
+            }
+        });
+        const query = params.toString() ? `?${params.toString()}` : '';
+        
         // 使用相对路径，让nginx代理处理
         if (window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1') {
             // 本地开发环境
-            return `${this.baseURL}/view/${encodedPath}`;
+            return `${this.baseURL}/view/${encodedPath}${query}`;
         } else {
             // 生产环境，使用相对路径
-            return `/api/view/${encodedPath}`;
+            return `/api/view/${encodedPath}${query}`;
         }
     }
 
@@ -176,10 +239,52 @@ class NanyiAPI {
         return new Promise(resolve => setTimeout(resolve, ms));
     }
 
+    /**
+     * 批量获取当前访客的点赞状态，返回 {品牌名: {liked, like_count}}
+     */
+    async getLikeStatuses(brandNames) {
+        const statuses = {};
+        // 服务端单次最多50个品牌
+        for (let i = 0; i < brandNames.length; i += 50) {
+            const response = await this.request('/like/status', {
+                method: 'POST',
+                body: JSON.stringify({ names: brandNames.slice(i, i + 50) })
+            });
+            if (response && response.success) {
+                Object.assign(statuses, response.statuses);
+            }
+        }
+        return statuses;
+    }
+
     /**
      * 批量获取图片信息
      */
     async getBatchImages(brandNames) {
+        // 按服务端上限（单次最多50个品牌）分批并行请求，保持与逐个调用getBrandDetail相同的返回结构
+        const chunks = [];
+        for (let i = 0; i < brandNames.length; i += 50) {
+            chunks.push(brandNames.slice(i, i + 50));
+        }
+        const results = await Promise.all(chunks.map(names => this.getBatchChunk(names)));
+        return results.flat();
+    }
+
+    async getBatchChunk(brandNames) {
+        try {
+            const response = await this.request('/brands/batch', {
+                method: 'POST',
+                body: JSON.stringify({ names: brandNames })
+            });
+            if (response && response.success) {
+                return brandNames
+                    .filter(name => response.brands[name])
+                    .map(name => ({ success: true, ...response.brands[name] }));
+            }
+        } catch (error) {
+            console.warn('批量获取品牌详情失败，改为逐个获取:', error);
+        }
+
         const promises = brandNames.map(name => this.getBrandDetail(name));
         const results = await Promise.allSettled(promises);
         
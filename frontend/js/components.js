@@ -7,7 +7,7 @@ const BrandCard = {
     props: ['brand'],
     template: `
         <div class="brand-card" @click="$emit('click', brand)">
-            <div class="brand-image-container">
+            <div class="brand-image-container" :style="getPlaceholderStyle(brand)">
                 <img 
                     :src="getDesignImage(brand)" 
                     :alt="brand.name"
@@ -31,12 +31,32 @@ const BrandCard = {
         getDesignImage(brand) {
             const designImage = brand.images.find(img => img.image_type === '设计图');
             if (designImage) {
+                // 优先使用本地衍生缩略图
+                if (designImage.thumbnail && designImage.thumbnail.startsWith('/static/derivatives/')) {
+                    return designImage.thumbnail;
+                }
                 // 使用前端静态文件路径，正确编码中文字符
                 const encodedPath = designImage.relative_path.split('/').map(part => encodeURIComponent(part)).join('/');
                 return `/static/images/${encodedPath}`;
             }
             return '/static/images/placeholder.svg';
         },
+        getPlaceholderStyle(brand) {
+            // 图片加载前用主色和LQIP占位图填充容器
+            const designImage = brand.images.find(img => img.image_type === '设计图');
+            if (!designImage) {
+                return {};
+            }
+            const style = {};
+            if (designImage.dominant_color) {
+                style.backgroundColor = designImage.dominant_color;
+            }
+            if (designImage.lqip) {
+                style.backgroundImage = `url("${designImage.lqip}")`;
+                style.backgroundSize = 'cover';
+            }
+            return style;
+        },
         handleImageError(event) {
             event.target.src = '/static/images/placeholder.svg';
         }
@@ -15,7 +15,7 @@ load_dotenv()
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-from flask import Flask, send_from_directory, render_template_string
+from flask import Flask, request, send_from_directory, render_template_string
 from flask_cors import CORS
 
 def create_frontend_app():
@@ -33,11 +33,30 @@ def create_frontend_app():
         """主页"""
         return send_from_directory('.', 'index.html')
     
+    # static/images下的图片按Accept返回WebP/AVIF兄弟文件
+    from backend.services.image_variants import register_static_negotiation
+    register_static_negotiation(app)
+    
     @app.route('/<path:filename>')
     def static_files(filename):
         """静态文件服务"""
         return send_from_directory('.', filename)
     
+    # 按Accept-Encoding压缩，index.html和静态文本资源使用预压缩缓存
+    from werkzeug.security import safe_join
+    from backend.utils.compression import init_compression
+    
+    def resolve_static_file():
+        if request.endpoint == 'index':
+            return os.path.join(app.root_path, 'index.html')
+        if request.endpoint == 'static':
+            return safe_join(app.static_folder, request.view_args['filename'])
+        if request.endpoint == 'static_files':
+            return safe_join(app.root_path, request.view_args['filename'])
+        return None
+    
+    init_compression(app, resolve_static_file)
+    
     @app.route('/health')
     def health():
         """健康检查"""
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON编码基准测试：对比原先的编码方式（标准库、缩进、ASCII转义、排序键）和当前的JSON提供者
+
+用法（在项目根目录）：
+    python scripts/benchmark_json.py [图片数量]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+
+from backend.utils.json_provider import FastJSONProvider, orjson
+
+
+def _sample_payload(image_count: int):
+    """构造与 /api/images?load_all=true 结构相同的数据（每张图片在images和brands中各出现一次）"""
+    images = []
+    for i in range(image_count):
+        brand = f"品牌{i // 12}(颜色{i % 3})"
+        images.append({
+            'filename': f"{brand}_{i}.jpg",
+            'relative_path': f"{brand}/{brand}_{i}.jpg",
+            'brand_name': brand,
+            'url': f"/static/derivatives/{i:020x}-medium.webp",
+            'thumbnail': f"/static/derivatives/{i:020x}-thumbnail.webp",
+            'original': f"/static/images/{brand}/{brand}_{i}.jpg",
+            'size': 1024 * (i % 500 + 100),
+            'modified': 1700000000.0 + i,
+            'width': 1200,
+            'height': 1600,
+            'dominant_color': '#a08c78',
+            'lqip': 'data:image/webp;base64,' + 'A' * 120,
+        })
+
+    brands = []
+    for start in range(0, image_count, 12):
+        brand_images = images[start:start + 12]
+        brands.append({
+            'name': brand_images[0]['brand_name'],
+            'images': brand_images,
+            'year': 2024,
+            'material': '真丝',
+            'theme_series': '经典系列',
+            'print_size': '循环印花料',
+            'inspiration_origin': '设计灵感来源于传统文化与现代美学的融合。',
+            'publish_month': '2024-01',
+            'imageCount': len(brand_images),
+            'like_count': start,
+            'updated_at': datetime(2024, 1, 1, 12, 0, 0),
+        })
+    return {'success': True, 'images': images, 'brands': brands, 'total': image_count}
+
+
+def benchmark(image_count: int = 2000, rounds: int = 20):
+    """对比原先的编码方式（标准库、缩进、ASCII转义、排序键）和当前提供者"""
+    from flask import Flask
+
+    payload = _sample_payload(image_count)
+    app = Flask(__name__)
+    app.config['JSON_AS_ASCII'] = False
+
+    legacy = DefaultJSONProvider(app)
+    candidates = [
+        ('json（原方式：indent=2）', lambda: legacy.dumps(payload, indent=2).encode('utf-8')),
+        ('json（紧凑）', lambda: FastJSONProvider(app, use_orjson=False).dump_bytes(payload)),
+    ]
+    if orjson is not None:
+        fast = FastJSONProvider(app)
+        candidates.append(('orjson（紧凑）', lambda: fast.dump_bytes(payload)))
+    else:
+        print("⚠️ 未安装orjson，只比较标准库")
+
+    print(f"📊 {image_count}张图片, 每项{rounds}轮")
+    baseline = None
+    for name, encode in candidates:
+        body = encode()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            encode()
+        elapsed = (time.perf_counter() - start) / rounds * 1000
+        baseline = baseline or elapsed
+        print(f"  {name:<24} {elapsed:8.2f}ms/次  {len(body) / 1024:8.1f}KB  x{baseline / elapsed:.1f}")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""品牌名匹配：按品牌名查找时只接受完全相同或互相包含的品牌"""
+
+from backend.services.brand_matcher import BrandMatcher
+
+
+def make_matcher():
+    return BrandMatcher({
+        'products': ['江南春', '牡丹亭', '花蝶引', '雪中春信'],
+        'images': ['江南春(青绿)', '牡丹亭(灰紫)', '花蝶引(墨蓝)'],
+    })
+
+
+def test_near_miss_names_do_not_match_other_brands():
+    matcher = make_matcher()
+    for query in ('江南秋', '牡丹花', '花蝶飞', '雪中秋信'):
+        assert matcher.match(query, source='products', limit=1, containment_only=True) == []
+        assert matcher.match(query, source='images', containment_only=True) == []
+
+
+def test_exact_and_containment_still_match():
+    matcher = make_matcher()
+    assert matcher.match('江南春', source='products', limit=1, containment_only=True)[0] == ('江南春', 1.0)
+    assert matcher.match('江南春(胭脂)', source='products', limit=1, containment_only=True)[0][0] == '江南春'
+    assert matcher.match('江 南-春', source='products', limit=1, containment_only=True)[0][0] == '江南春'
+    assert matcher.match('花蝶', source='images', containment_only=True)[0][0] == '花蝶引(墨蓝)'
+    assert matcher.match('雪中春信2024', source='products', limit=1, containment_only=True)[0][0] == '雪中春信'
+
+
+def test_similar_names_are_still_ranked_without_containment_only():
+    matcher = make_matcher()
+    assert matcher.match('江南秋', source='products', limit=1)[0][0] == '江南春'
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""点赞状态接口测试：切换点赞后，增量写回数据库之前/like/status就返回新的点赞数"""
+
+import pytest
+from flask import Flask
+
+from backend.models import brand_like
+from backend.routes import api
+from backend.services.like_counter import LikeCounter
+
+
+class FakeCursor:
+    """只实现点赞接口用到的几条SQL的内存数据库游标"""
+
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = 0
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        likes, stats = self.db['likes'], self.db['stats']
+        if sql.startswith('INSERT IGNORE INTO brand_likes'):
+            key = (params[0], params[1])
+            self.rowcount = 0 if key in likes else 1
+            likes.add(key)
+        elif sql.startswith('DELETE FROM brand_likes'):
+            key = (params[0], params[1])
+            self.rowcount = 1 if key in likes else 0
+            likes.discard(key)
+        elif sql.startswith('SELECT like_count FROM brand_like_stats'):
+            self._rows = [{'like_count': stats[params[0]]}] if params[0] in stats else []
+        elif sql.startswith('SELECT brand_name, like_count FROM brand_like_stats'):
+            self._rows = [{'brand_name': name, 'like_count': stats[name]} for name in params if name in stats]
+        elif sql.startswith('SELECT brand_name, user_hash FROM brand_likes'):
+            self._rows = [{'brand_name': b, 'user_hash': u} for b, u in likes if u in params]
+        else:
+            raise AssertionError(f"未预期的SQL: {sql}")
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    db = {'likes': set(), 'stats': {'江南春': 5}}
+    monkeypatch.setattr(brand_like, 'get_db_connection', lambda: FakeConnection(db))
+
+    # 独立的计数缓冲，写回间隔足够长，保证请求期间不会写回
+    counter = LikeCounter()
+    counter.FLUSH_INTERVAL = 3600
+    monkeypatch.setattr(brand_like, 'like_counter', counter)
+    monkeypatch.setattr(api, 'like_counter', counter)
+
+    app = Flask(__name__)
+    app.register_blueprint(api.api_bp)
+    return app.test_client(), counter
+
+
+def test_like_status_includes_unflushed_delta(client):
+    client, counter = client
+
+    response = client.post('/api/like/card/江南春(青)')
+    assert response.get_json()['like_count'] == 6
+    assert counter.pending('江南春') == 1
+
+    status = client.post('/api/like/status', json={'names': ['江南春(青)']}).get_json()
+    assert status['statuses']['江南春(青)'] == {'liked': True, 'like_count': 6}
+
+    client.post('/api/like/card/江南春(青)')
+    status = client.get('/api/like/status?names=江南春').get_json()
+    assert status['statuses']['江南春'] == {'liked': False, 'like_count': 5}
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""产品列表search过滤测试：严格模式的结果与原先多字段 LIKE '%search%' 一致"""
+
+import pytest
+from flask import Flask
+
+from backend.models import db
+from backend.models.product import Product
+from backend.services import product_service
+from backend.services.product_service import ProductService
+from backend.services.search_index import SearchIndex
+
+PRODUCTS = [
+    ('江南春', 2024, '2024-03', 'Cotton Blend', '山海'),
+    ('江南秋', 2023, '2023-05', '真丝', '节气'),
+    ('牡丹亭', 2022, '2022-01', '雪纺 (进口)', '戏曲'),
+]
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        for brand_name, year, month, material, theme in PRODUCTS:
+            db.session.add(Product(brand_name=brand_name, title=f'{brand_name}标题', year=year,
+                                   publish_month=month, material=material, theme_series=theme))
+        db.session.commit()
+        # 每个测试使用新的索引，首次查询时从测试数据库构建
+        index = SearchIndex()
+        monkeypatch.setattr(product_service, 'search_index', index)
+        yield app
+
+
+def _brands(search):
+    return sorted(p.brand_name for p in ProductService._filtered_query(search).all())
+
+
+def _like_brands(search):
+    term = f'%{search}%'
+    fields = (Product.brand_name, Product.title, Product.material, Product.theme_series,
+              Product.inspiration_origin, Product.year, Product.publish_month)
+    return sorted(p.brand_name for p in Product.query.filter(db.or_(*(f.like(term) for f in fields))).all())
+
+
+@pytest.mark.parametrize('search', ['江南', '江%春', '江_春', '20_4', 'cot_on', 'otton b', '%', '_', '(', '-03'])
+def test_filter_matches_like(app, search):
+    assert _brands(search) == _like_brands(search)
+
+
+def test_wildcards(app):
+    assert _brands('%') == ['江南春', '江南秋', '牡丹亭']
+    assert _brands('江%春') == ['江南春']
+    assert _brands('江_秋') == ['江南秋']
+    assert _brands('cot_on') == ['江南春']
+
+
+def test_query_without_tokens_falls_back_to_like(app):
+    index = product_service.search_index
+    assert index.search_ids('%', strict=True) is None
+    assert index.search_ids('(', strict=True) is None
+    assert _brands('(') == ['牡丹亭']
+
+
+def test_word_substring_index():
+    index = SearchIndex()
+    index.rebuild([
+        {'id': 1, 'brand_name': 'Cotton', 'year': 2024},
+        {'id': 2, 'brand_name': 'Cottonwood', 'year': 2023},
+    ])
+    assert index._words_containing('ott') == {'cotton', 'cottonwood'}
+    assert index._words_containing('tonw') == {'cottonwood'}
+    assert index._words_containing('02') == {'2024', '2023'}
+
+    index._remove(2)
+    assert index._words_containing('ott') == {'cotton'}
+    assert 'w' not in index._word_grams